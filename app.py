@@ -1,9 +1,6 @@
+import startup_profile
 from flask import Flask, request, jsonify, send_file, Response, send_from_directory
 from flask_cors import CORS
-import cv2
-import numpy as np
-from PIL import Image
-from ultralytics import YOLO
 import os
 import base64
 import io
@@ -11,72 +8,116 @@ import json
 from datetime import datetime
 import threading
 import time
+import atexit
+from contextlib import closing
+from config import Config
+import detector
+from detector import CLASS_LABELS, process_image, process_images, annotate_frame
+from artifacts import ArtifactStore
+from live_stats import LiveStats
+from event_store import EventStore
+from sources import SourceManager, load_source_definitions
+from quality import QualityController, build_quality_ladder
+from motion import MotionGate
+from frame_ring import iter_capture_frames, iter_video_frames
+from model_profile import ModelProfiles
+from bulk import iter_archive_images, iter_uploaded_images, open_archive, run_bulk_detection, spool_upload
+from utils import allowed_file, cleanup_temp_files, parse_timestamp
+
+# cv2, numpy, PIL and ultralytics/torch are imported inside the functions
+# that use them so the server can bind and answer /api/health immediately.
+startup_profile.record("app_imports", time.perf_counter() - startup_profile.PROFILE_START,
+                       startup_profile.PROFILE_START)
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 CORS(app)
 
 # Global variables
-model = None
-model_loaded = False
-CLASS_LABELS = {0: "Helmet", 1: "Vest"}
-
-def load_model():
-    """Load YOLO model"""
-    global model, model_loaded
-    try:
-        # You can change the model path here
-        model_path = "model/BESTSModel.pt"
-        model = YOLO(model_path)
-        model_loaded = True
-        print(f"✅ Model loaded successfully from {model_path}")
-    except Exception as e:
-        print(f"❌ Error loading model: {e}")
-        model_loaded = False
+artifact_store = ArtifactStore(
+    Config.ARTIFACT_DIR,
+    max_bytes=Config.ARTIFACT_MAX_MB * 1024 * 1024,
+    ttl_seconds=Config.ARTIFACT_TTL_HOURS * 3600
+)
+live_stats = LiveStats(
+    CLASS_LABELS.values(),
+    window_seconds=Config.LIVE_STATS_WINDOW,
+    recent_size=Config.LIVE_STATS_RECENT,
+    publish_interval=Config.LIVE_STATS_PUBLISH_INTERVAL
+)
+event_store = EventStore(
+    Config.EVENT_DB_PATH,
+    batch_size=Config.EVENT_BATCH_SIZE,
+    flush_interval=Config.EVENT_FLUSH_INTERVAL,
+    max_queue=Config.EVENT_QUEUE_SIZE
+)
+model_profiles = ModelProfiles(
+    Config.MODEL_PROFILE_DIR,
+    batch_sizes=Config.MODEL_PROFILE_BATCH_SIZES,
+    image_sizes=Config.MODEL_PROFILE_IMAGE_SIZES,
+    iterations=Config.MODEL_PROFILE_ITERATIONS,
+    timeout=Config.MODEL_PROFILE_TIMEOUT
+)
 
-def process_image(image, confidence_threshold=0.5):
-    """Process image and return detection results"""
-    if not model_loaded:
-        return None, "Model not loaded"
-    
-    try:
-        results = model(image, conf=confidence_threshold)
-        result = results[0]
-        
-        detections = []
-        if result.boxes is not None:
-            for box in result.boxes:
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                cls = int(box.cls[0].cpu().numpy())
-                conf = float(box.conf[0].cpu().numpy())
-                
-                detections.append({
-                    "class": CLASS_LABELS[cls],
-                    "confidence": round(conf, 3),
-                    "bbox": [int(x1), int(y1), int(x2), int(y2)]
-                })
-        
-        return detections, None
-    except Exception as e:
-        return None, str(e)
+def create_motion_gate(rois=None):
+    """Build a motion gate from configuration"""
+    return MotionGate(
+        width=Config.MOTION_WIDTH,
+        pixel_threshold=Config.MOTION_PIXEL_THRESHOLD,
+        min_area=Config.MOTION_MIN_AREA,
+        learning_rate=Config.MOTION_LEARNING_RATE,
+        max_skip=Config.MOTION_MAX_SKIP,
+        rois=rois
+    )
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
-        "model_loaded": model_loaded,
+        "model_loaded": detector.model_loaded,
+        "model_state": detector.model_state,
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({
+        "status": "alive",
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: the model is loaded and warmed up"""
+    ready = detector.model_state == "ready"
+    return jsonify({
+        "status": "ready" if ready else "not_ready",
+        "model_state": detector.model_state,
+        "model_path": detector.model_path,
+        "error": detector.model_error,
+        "timestamp": datetime.now().isoformat()
+    }), 200 if ready else 503
+
+@app.route('/api/health/startup', methods=['GET'])
+def startup_breakdown():
+    """Startup time breakdown (imports, model load, warm-up)"""
+    return jsonify(startup_profile.breakdown())
+
 @app.route('/api/detect/image', methods=['POST'])
 def detect_image():
     """Detect objects in uploaded image"""
+    import cv2
+    import numpy as np
+    from PIL import Image
+    
     try:
         if 'image' not in request.files:
             return jsonify({"error": "No image file provided"}), 400
         
         file = request.files['image']
         confidence = float(request.form.get('confidence', 0.5))
+        source = request.form.get('source', 'upload')
         
         # Read image
         image = Image.open(file.stream)
@@ -87,6 +128,8 @@ def detect_image():
         if error:
             return jsonify({"error": error}), 500
         
+        event_store.record(source, detections)
+        
         # Convert image to base64 for response
         img_array = np.array(image)
         
@@ -115,73 +158,197 @@ def detect_image():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/detect/batch', methods=['POST'])
+def detect_batch():
+    """Detect objects in a zip archive or many uploaded images
+
+    Results are streamed back as newline-delimited JSON, one line per image
+    in upload order, followed by a summary line.
+    """
+    spooled = []
+    archive = None
+    
+    def cleanup():
+        if archive is not None:
+            archive.close()
+        while spooled:
+            path = spooled.pop()
+            if os.path.exists(path):
+                os.remove(path)
+    
+    try:
+        confidence = float(request.form.get('confidence', 0.5))
+        annotate = request.form.get('annotate', 'false').lower() == 'true'
+        source = request.form.get('source', 'bulk')
+        
+        if 'archive' not in request.files and not request.files.getlist('images'):
+            return jsonify({"error": "No archive or image files provided"}), 400
+        
+        if not detector.model_loaded:
+            return jsonify({"error": "Model not loaded"}), 503
+        
+        # Spool uploads to disk now; the request body is not guaranteed to be
+        # readable once the streamed response has started
+        if not os.path.exists(Config.UPLOAD_FOLDER):
+            os.makedirs(Config.UPLOAD_FOLDER)
+        if 'archive' in request.files:
+            spooled.append(spool_upload(request.files['archive'], Config.UPLOAD_FOLDER))
+            archive = open_archive(spooled[0])
+            if archive is None:
+                cleanup()
+                return jsonify({"error": "Archive must be a zip file"}), 400
+            items = iter_archive_images(
+                archive,
+                Config.ALLOWED_IMAGE_EXTENSIONS,
+                Config.BULK_MAX_IMAGE_MB * 1024 * 1024
+            )
+        else:
+            uploads = []
+            for file in request.files.getlist('images'):
+                if file.filename and allowed_file(file.filename, Config.ALLOWED_IMAGE_EXTENSIONS):
+                    spooled.append(spool_upload(file, Config.UPLOAD_FOLDER))
+                    uploads.append((file.filename, spooled[-1]))
+            items = iter_uploaded_images(uploads)
+        
+        def handle_result(result, image):
+            event_store.record(source, result['detections'])
+            if annotate:
+                import cv2
+                annotated = annotate_frame(image, result['detections'])
+                ret, buffer = cv2.imencode('.jpg', annotated)
+                result['image'] = base64.b64encode(buffer).decode()
+        
+        def generate():
+            for result in run_bulk_detection(
+                items,
+                lambda images: process_images(images, confidence),
+                batch_size=Config.BULK_BATCH_SIZE,
+                workers=Config.BULK_DECODE_WORKERS,
+                max_in_flight=Config.BULK_MAX_IN_FLIGHT,
+                on_result=handle_result
+            ):
+                yield json.dumps(result) + "\n"
+        
+        response = Response(generate(), mimetype='application/x-ndjson')
+        response.call_on_close(cleanup)
+        return response
+        
+    except Exception as e:
+        cleanup()
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/detect/video', methods=['POST'])
 def detect_video():
     """Detect objects in uploaded video"""
+    import cv2
+    from PIL import Image
+    
     try:
         if 'video' not in request.files:
             return jsonify({"error": "No video file provided"}), 400
         
         file = request.files['video']
         confidence = float(request.form.get('confidence', 0.5))
+        source = request.form.get('source', 'video')
+        use_motion_gate = request.form.get('motion_gating', str(Config.MOTION_GATING)).lower() == 'true'
         
         # Save uploaded video temporarily
-        temp_path = f"temp_video_{int(time.time())}.mp4"
+        if not os.path.exists(Config.UPLOAD_FOLDER):
+            os.makedirs(Config.UPLOAD_FOLDER)
+        temp_path = os.path.join(Config.UPLOAD_FOLDER, f"temp_video_{int(time.time() * 1000)}.mp4")
         file.save(temp_path)
         
-        # Process video
-        cap = cv2.VideoCapture(temp_path)
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        # Create output video writer
-        output_path = f"output_video_{int(time.time())}.mp4"
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        frame_count = 0
-        total_detections = 0
+        # Reserve output artifact so the sweeper leaves it alone while writing
+        output_name, output_path = artifact_store.reserve('mp4')
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        cap = out = None
+        try:
+            # Process video
+            cap = cv2.VideoCapture(temp_path)
+            fps = int(cap.get(cv2.CAP_PROP_FPS))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
-            # Convert frame to PIL Image
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(frame_rgb)
+            # Create output video writer
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
             
-            # Process frame
-            detections, error = process_image(pil_image, confidence)
+            frame_count = 0
+            total_detections = 0
+            gate = create_motion_gate() if use_motion_gate else None
             
-            if detections:
-                total_detections += len(detections)
-                
-                # Draw bounding boxes
-                for detection in detections:
-                    x1, y1, x2, y2 = detection['bbox']
-                    color = (0, 255, 0) if detection['class'] == 'Helmet' else (255, 255, 0)
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            if Config.CAPTURE_TRANSPORT == 'shared_memory':
+                # Decode in a separate process; frames are read and annotated
+                # in place in shared memory
+                cap.release()
+                max_shape = (height, width, 3) if width and height else \
+                    (Config.FRAME_RING_MAX_HEIGHT, Config.FRAME_RING_MAX_WIDTH, 3)
+                frames = iter_video_frames(temp_path, Config.FRAME_RING_SLOTS, max_shape)
+            else:
+                frames = iter_capture_frames(cap)
+            
+            with closing(frames):
+                for frame in frames:
+                    region = gate.plan(frame) if gate is not None else None
+                    if gate is not None and region is None:
+                        # Unchanged frame: reuse the last detections
+                        detections = gate.last_detections
+                    else:
+                        image = frame if region is None else MotionGate.crop(frame, region)
+                        
+                        # Convert frame to PIL Image
+                        frame_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                        pil_image = Image.fromarray(frame_rgb)
+                        
+                        # Process frame
+                        detections, error = process_image(pil_image, confidence)
+                        
+                        if gate is not None and detections is not None:
+                            detections = gate.merge(detections, region, frame.shape)
+                    
+                    if detections:
+                        total_detections += len(detections)
+                        event_store.record(source, detections)
+                        
+                        # Draw bounding boxes
+                        for detection in detections:
+                            x1, y1, x2, y2 = detection['bbox']
+                            color = (0, 255, 0) if detection['class'] == 'Helmet' else (255, 255, 0)
+                            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+                            
+                            label = f"{detection['class']} {detection['confidence']:.2f}"
+                            cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
                     
-                    label = f"{detection['class']} {detection['confidence']:.2f}"
-                    cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+                    out.write(frame)
+                    frame_count += 1
             
-            out.write(frame)
-            frame_count += 1
-        
-        cap.release()
-        out.release()
-        
-        # Clean up temp file
-        os.remove(temp_path)
+            out.release()
+            artifact_store.finalize(output_name)
+        except Exception:
+            # Close the writer before its partial file is removed
+            if out is not None:
+                out.release()
+            artifact_store.discard(output_name)
+            raise
+        finally:
+            # Release capture and writer handles even when processing failed
+            if cap is not None:
+                cap.release()
+            if out is not None:
+                out.release()
+            
+            # Clean up temp file
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         
         return jsonify({
             "success": True,
-            "output_path": output_path,
+            "output_path": output_name,
+            "video_url": f"/api/video/{output_name}",
             "frame_count": frame_count,
             "total_detections": total_detections,
-            "fps": fps
+            "fps": fps,
+            "motion": gate.stats() if gate is not None else None
         })
         
     except Exception as e:
@@ -189,85 +356,407 @@ def detect_video():
 
 @app.route('/api/video/<filename>')
 def get_video(filename):
-    """Serve processed video file"""
+    """Serve processed video file with Range (206) and ETag support"""
+    path = artifact_store.resolve(filename)
+    if path is None:
+        return jsonify({"error": "Video not found"}), 404
+    
+    # Artifacts are immutable once finalized, so conditional responses are
+    # safe: werkzeug answers Range with 206 Partial Content by seeking in the
+    # file and If-None-Match with 304 from the ETag.
+    return send_file(
+        path,
+        mimetype='video/mp4',
+        conditional=True,
+        etag=True,
+        max_age=Config.ARTIFACT_CACHE_MAX_AGE
+    )
+
+@app.route('/api/artifacts', methods=['GET'])
+def get_artifacts():
+    """Get artifact store usage"""
+    return jsonify(artifact_store.usage())
+
+_services_lock = threading.Lock()
+_services_pid = None
+
+def start_background_services(debug=False):
+    """Start background model loading and maintenance threads, once per process"""
+    global _services_pid
+    
+    # With the debug reloader the parent process only watches files; loading
+    # the model or opening cameras there would do everything twice.
+    if debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    
+    # Keyed on the pid so a worker forked from a preloaded app starts its own
+    with _services_lock:
+        if _services_pid == os.getpid():
+            return
+        _services_pid = os.getpid()
+    
+    detector.load_model_async(warm=True)
+    
+    if not os.path.exists(Config.UPLOAD_FOLDER):
+        os.makedirs(Config.UPLOAD_FOLDER)
+    
+    event_store.start_writer()
+    atexit.register(event_store.close)
+    
+    source_manager.start()
+    atexit.register(source_manager.stop)
+    
+    artifact_store.start_sweeper(
+        Config.ARTIFACT_SWEEP_INTERVAL,
+        on_sweep=lambda: cleanup_temp_files(
+            Config.UPLOAD_FOLDER, "temp_*", Config.ARTIFACT_TTL_HOURS
+        )
+    )
+
+@app.before_request
+def ensure_background_services():
+    """Start background services on the first request under WSGI servers
+
+    gunicorn and other WSGI servers import app:app without running
+    run_dashboard.py, so nothing else would load the model, start the event
+    writer or the artifact sweeper in their worker processes.
+    """
+    if _services_pid != os.getpid():
+        start_background_services()
+
+quality_controller = QualityController(
+    build_quality_ladder(
+        Config.QUALITY_JPEG,
+        Config.QUALITY_IMAGE_SIZES,
+        Config.QUALITY_MAX_STRIDE,
+        Config.QUALITY_MODELS
+    ),
+    target_latency=Config.LATENCY_TARGET_MS / 1000,
+    tolerance=Config.QUALITY_TOLERANCE,
+    adjust_interval=Config.QUALITY_ADJUST_INTERVAL,
+    upgrade_cooldown=Config.QUALITY_UPGRADE_COOLDOWN,
+    cpu_high=Config.QUALITY_CPU_HIGH,
+    cpu_low=Config.QUALITY_CPU_LOW,
+    enabled=Config.ADAPTIVE_QUALITY
+)
+_quality_models = {}
+_quality_models_lock = threading.Lock()
+
+def get_quality_model(name):
+    """Get a model from MODEL_DIR for the quality controller
+
+    Returns None (use the loaded model) while the requested model is still
+    loading in the background, so switching never stalls the live pipeline.
+    """
+    if name is None:
+        return None
+    
+    with _quality_models_lock:
+        if name in _quality_models:
+            return _quality_models[name]
+        _quality_models[name] = None
+    
+    def load():
+        try:
+            loaded = detector.create_model(os.path.join(Config.MODEL_DIR, name))
+            with _quality_models_lock:
+                _quality_models[name] = loaded
+            print(f"✅ Quality model loaded: {name}")
+        except Exception as e:
+            print(f"❌ Error loading quality model {name}: {e}")
+    
+    threading.Thread(target=load, daemon=True).start()
+    return None
+
+def infer_live_batch(frames):
+    """Run a scheduled batch with the current adaptive quality settings"""
+    level = quality_controller.level
+    return process_images(
+        frames,
+        Config.DEFAULT_CONFIDENCE_THRESHOLD,
+        imgsz=level["imgsz"],
+        detector=get_quality_model(level["model"])
+    )
+
+def handle_source_result(source_id, frame, detections, frame_time, inferred=True):
+    """Feed scheduled inference results into live statistics and the event log"""
+    live_stats.record(detections, source_id, frame_time)
+    event_store.record(source_id, detections, frame_time)
+    
+    # Gate-skipped frames never reach the model; their near-zero latency
+    # would hide a slow pipeline from the quality controller
+    if inferred:
+        quality_controller.observe(time.time() - frame_time)
+        source_manager.stride = quality_controller.level["stride"]
+
+source_manager = SourceManager(
+    infer_batch=infer_live_batch,
+    on_result=handle_source_result,
+    max_batch_size=Config.INFERENCE_BATCH_SIZE,
+    gate_factory=create_motion_gate if Config.MOTION_GATING else None,
+    transport=Config.CAPTURE_TRANSPORT,
+    ring_options={
+        "slots": Config.FRAME_RING_SLOTS,
+        "max_shape": (Config.FRAME_RING_MAX_HEIGHT, Config.FRAME_RING_MAX_WIDTH, 3)
+    }
+)
+for definition in load_source_definitions(Config.SOURCES_FILE, Config.CAMERA_INDEX, Config.STREAM_FPS):
     try:
-        return send_file(filename, mimetype='video/mp4')
-    except Exception as e:
-        return jsonify({"error": str(e)}), 404
+        source_manager.add_source(
+            definition['id'],
+            definition['uri'],
+            fps=definition.get('fps', Config.STREAM_FPS),
+            priority=definition.get('priority', 1),
+            loop=definition.get('loop', True),
+            rois=definition.get('rois'),
+            transport=definition.get('transport')
+        )
+    except ValueError as e:
+        print(f"❌ Skipping source {definition.get('id')}: {e}")
 
-def generate_frames():
-    """Generate frames for real-time detection"""
-    # This would typically connect to a camera
-    # For demo purposes, we'll use a placeholder
-    cap = cv2.VideoCapture(0)  # Use default camera
+_jpeg_cache = {}
+_jpeg_cache_lock = threading.Lock()
+
+def encode_result(source_id, result):
+    """Annotate and JPEG-encode a source result once, shared by all viewers"""
+    import cv2
+    
+    seq, frame, detections, _ = result
+    with _jpeg_cache_lock:
+        cached = _jpeg_cache.get(source_id)
+        if cached is not None and cached[0] == seq:
+            return cached[1]
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Convert frame to PIL Image
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_rgb)
-        
-        # Process frame
-        detections, error = process_image(pil_image, 0.5)
-        
-        if detections:
-            # Draw bounding boxes
-            for detection in detections:
-                x1, y1, x2, y2 = detection['bbox']
-                color = (0, 255, 0) if detection['class'] == 'Helmet' else (255, 255, 0)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                
-                label = f"{detection['class']} {detection['confidence']:.2f}"
-                cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-        
-        # Encode frame
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
+    annotated = annotate_frame(frame.copy(), detections)
+    jpeg_quality = quality_controller.level["jpeg_quality"]
+    ret, buffer = cv2.imencode('.jpg', annotated, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    data = buffer.tobytes()
+    
+    with _jpeg_cache_lock:
+        _jpeg_cache[source_id] = (seq, data)
+    return data
+
+def generate_frames(source_id):
+    """Generate annotated frames for real-time detection"""
+    for result in source_manager.results(source_id):
+        frame = encode_result(source_id, result)
         
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
 
 @app.route('/api/stream')
-def video_stream():
+@app.route('/api/stream/<source_id>')
+def video_stream(source_id=None):
     """Real-time video stream endpoint"""
-    return Response(generate_frames(),
+    source_id = source_id or source_manager.default_source_id()
+    if source_id not in source_manager.sources:
+        return jsonify({"error": "Source not found"}), 404
+    
+    return Response(generate_frames(source_id),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/api/sources', methods=['GET'])
+def get_sources():
+    """Get sources with achieved FPS and lag"""
+    return jsonify(source_manager.metrics())
+
+@app.route('/api/quality', methods=['GET'])
+def get_quality():
+    """Get adaptive quality level, latency and adjustment history"""
+    return jsonify(quality_controller.status())
+
+@app.route('/api/sources', methods=['POST'])
+def add_source():
+    """Register a new video source"""
+    try:
+        data = request.get_json()
+        if not data or not data.get('id') or data.get('uri') in (None, ''):
+            return jsonify({"error": "Source id and uri are required"}), 400
+        
+        source = source_manager.add_source(
+            data['id'],
+            data['uri'],
+            fps=float(data.get('fps', Config.STREAM_FPS)),
+            priority=float(data.get('priority', 1)),
+            loop=bool(data.get('loop', True)),
+            rois=data.get('rois'),
+            transport=data.get('transport')
+        )
+        
+        return jsonify({
+            "success": True,
+            "source": source.metrics()
+        })
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/sources/<source_id>', methods=['DELETE'])
+def remove_source(source_id):
+    """Stop and remove a video source"""
+    if not source_manager.remove_source(source_id):
+        return jsonify({"error": "Source not found"}), 404
+    
+    return jsonify({"success": True})
+
+@app.route('/api/stream/stats')
+def stream_stats():
+    """Server-sent live statistics for the real-time stream"""
+    def events():
+        for payload in live_stats.subscribe():
+            yield f"data: {payload}\n\n"
+    
+    return Response(events(),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/stats/live', methods=['GET'])
+def get_live_stats():
+    """Get a single snapshot of the live statistics"""
+    return jsonify(live_stats.snapshot())
+
+def _event_query_args():
+    """Parse the common time range and filter arguments for event queries"""
+    end = parse_timestamp(request.args.get('end'), time.time())
+    start = parse_timestamp(request.args.get('start'), end - 24 * 3600)
+    return start, end, request.args.get('source'), request.args.get('class')
+
+@app.route('/api/events/summary', methods=['GET'])
+def get_event_summary():
+    """Get detection totals per source and class over a time range"""
+    try:
+        start, end, source, label = _event_query_args()
+        return jsonify({
+            "start": start,
+            "end": end,
+            "totals": event_store.summary(start, end, source, label)
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/events/series', methods=['GET'])
+def get_event_series():
+    """Get detection counts per minute or hour bucket"""
+    try:
+        start, end, source, label = _event_query_args()
+        granularity = request.args.get('granularity', 'hour')
+        return jsonify({
+            "start": start,
+            "end": end,
+            "granularity": granularity,
+            "series": event_store.series(start, end, granularity, source, label)
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/events', methods=['GET'])
+def get_events():
+    """Get raw detection events, newest first"""
+    try:
+        start, end, source, label = _event_query_args()
+        limit = max(1, min(int(request.args.get('limit', 100)), 10000))
+        return jsonify({
+            "events": event_store.events(start, end, source, label, limit),
+            "writer": event_store.stats()
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+def list_model_paths():
+    """Paths of the .pt files in the model directory"""
+    model_dir = Config.MODEL_DIR
+    if not os.path.exists(model_dir):
+        return []
+    return [f"{model_dir}/{file}" for file in sorted(os.listdir(model_dir)) if file.endswith('.pt')]
+
+def _selection_args(source):
+    """Read the latency budget query from request args or a JSON body"""
+    return (
+        float(source['max_latency_ms']),
+        int(source.get('batch_size', 1)),
+        int(source.get('imgsz', Config.MODEL_PROFILE_IMAGE_SIZES[0]))
+    )
+
 @app.route('/api/models', methods=['GET'])
 def get_models():
-    """Get available models"""
+    """Get available models with their cached performance profiles
+    
+    With ?max_latency_ms=X (and optionally batch_size, imgsz) the response
+    also names the most accurate profiled model that fits the budget.
+    """
     models = []
-    model_dir = "model"
-    if os.path.exists(model_dir):
-        for file in os.listdir(model_dir):
-            if file.endswith('.pt'):
-                models.append({
-                    "name": file.replace('.pt', ''),
-                    "path": f"{model_dir}/{file}"
-                })
+    for path in list_model_paths():
+        entry = {
+            "name": os.path.basename(path).replace('.pt', ''),
+            "path": path,
+            "loaded": os.path.abspath(path) == os.path.abspath(detector.model_path or '')
+        }
+        entry.update(model_profiles.describe(path))
+        models.append(entry)
+    
+    response = {"models": models}
+    if request.args.get('max_latency_ms'):
+        try:
+            max_latency_ms, batch_size, imgsz = _selection_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid selection parameters: {e}"}), 400
+        selected, reason = model_profiles.select(list_model_paths(), max_latency_ms, batch_size, imgsz)
+        response["selection"] = {
+            "model_path": selected,
+            "max_latency_ms": max_latency_ms,
+            "batch_size": batch_size,
+            "imgsz": imgsz,
+            "reason": reason
+        }
     
-    return jsonify({"models": models})
+    return jsonify(response)
+
+@app.route('/api/models/profile', methods=['POST'])
+def profile_models():
+    """Profile one model (model_path) or every unprofiled model in the background"""
+    data = request.get_json(silent=True) or {}
+    model_path = data.get('model_path')
+    force = bool(data.get('force', False))
+    
+    if model_path:
+        if model_path not in list_model_paths():
+            return jsonify({"error": "Invalid model path"}), 400
+        paths = [model_path]
+    else:
+        paths = list_model_paths()
+    
+    statuses = {path: model_profiles.start(path, force=force) for path in paths}
+    return jsonify({"success": True, "profiles": statuses}), 202
 
 @app.route('/api/load-model', methods=['POST'])
 def load_model_endpoint():
-    """Load a specific model"""
+    """Load a specific model, or the most accurate one within max_latency_ms"""
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         model_path = data.get('model_path')
+        selection = None
+        
+        if not model_path and data.get('max_latency_ms') is not None:
+            try:
+                max_latency_ms, batch_size, imgsz = _selection_args(data)
+            except ValueError as e:
+                return jsonify({"error": f"Invalid selection parameters: {e}"}), 400
+            model_path, reason = model_profiles.select(list_model_paths(), max_latency_ms, batch_size, imgsz)
+            if model_path is None:
+                return jsonify({"error": reason}), 409
+            selection = {"model_path": model_path, "reason": reason}
         
         if not model_path or not os.path.exists(model_path):
             return jsonify({"error": "Invalid model path"}), 400
         
-        global model, model_loaded
-        model = YOLO(model_path)
-        model_loaded = True
+        detector.set_model(detector.create_model(model_path), model_path)
         
         return jsonify({
             "success": True,
-            "message": f"Model {model_path} loaded successfully"
+            "message": f"Model {model_path} loaded successfully",
+            "selection": selection
         })
         
     except Exception as e:
@@ -279,8 +768,8 @@ def index():
     return send_from_directory('static', 'index.html')
 
 if __name__ == '__main__':
-    # Load model on startup
-    load_model()
+    # Load model in the background so the server binds immediately
+    start_background_services(debug=True)
     
     # Run the app
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,159 @@
+"""
+Output artifact store for Safety Detection Dashboard
+"""
+
+import os
+import re
+import time
+import uuid
+import logging
+import threading
+
+ARTIFACT_NAME_RE = re.compile(r'^[0-9a-f]{32}\.[a-z0-9]+$')
+
+
+class ArtifactStore:
+    """Managed directory of generated files with TTL and disk quota eviction"""
+
+    def __init__(self, directory, max_bytes, ttl_seconds):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._last_access = {}
+        self._sweeper = None
+        self._stop_event = threading.Event()
+
+    def reserve(self, extension='mp4'):
+        """Reserve a unique artifact and return (filename, path)
+
+        Reserved artifacts are never evicted until finalize() or discard()
+        is called, so a file that is still being written is safe from the
+        sweeper.
+        """
+        # Created on first use so importing the app leaves the disk untouched
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"{uuid.uuid4().hex}.{extension.lower()}"
+        with self._lock:
+            self._pending.add(filename)
+        return filename, os.path.join(self.directory, filename)
+
+    def finalize(self, filename):
+        """Mark a reserved artifact as complete and eligible for eviction"""
+        with self._lock:
+            self._pending.discard(filename)
+            self._last_access[filename] = time.time()
+
+    def discard(self, filename):
+        """Drop a reserved artifact, removing any partial file"""
+        with self._lock:
+            self._pending.discard(filename)
+            self._last_access.pop(filename, None)
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def resolve(self, filename):
+        """Return the absolute path of a finished artifact, or None"""
+        if not ARTIFACT_NAME_RE.match(filename):
+            return None
+
+        with self._lock:
+            if filename in self._pending:
+                return None
+            path = os.path.join(self.directory, filename)
+            if not os.path.isfile(path):
+                return None
+            self._last_access[filename] = time.time()
+        return path
+
+    def _scan(self):
+        """List finished artifacts as (filename, size, mtime, last_access)"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for filename in os.listdir(self.directory):
+            if not ARTIFACT_NAME_RE.match(filename) or filename in self._pending:
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                continue
+            last_access = self._last_access.get(filename, stat.st_mtime)
+            entries.append((filename, stat.st_size, stat.st_mtime, last_access))
+        return entries
+
+    def usage(self):
+        """Get artifact count and total size"""
+        with self._lock:
+            entries = self._scan()
+        return {
+            "directory": self.directory,
+            "artifacts": len(entries),
+            "pending": len(self._pending),
+            "total_bytes": sum(entry[1] for entry in entries),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def sweep(self):
+        """Remove expired artifacts, then evict least recently used over quota"""
+        removed = []
+        now = time.time()
+
+        with self._lock:
+            entries = self._scan()
+
+            survivors = []
+            for filename, size, mtime, last_access in entries:
+                if self.ttl_seconds and now - mtime > self.ttl_seconds:
+                    removed.append(filename)
+                else:
+                    survivors.append((filename, size, last_access))
+
+            total_bytes = sum(entry[1] for entry in survivors)
+            if self.max_bytes and total_bytes > self.max_bytes:
+                survivors.sort(key=lambda entry: entry[2])
+                for filename, size, _ in survivors:
+                    if total_bytes <= self.max_bytes:
+                        break
+                    removed.append(filename)
+                    total_bytes -= size
+
+            for filename in removed:
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+                self._last_access.pop(filename, None)
+
+        for filename in removed:
+            print(f"🧹 Evicted artifact: {filename}")
+        return removed
+
+    def start_sweeper(self, interval_seconds, on_sweep=None):
+        """Run sweep() periodically in a daemon thread"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return self._sweeper
+
+        def run():
+            while not self._stop_event.wait(interval_seconds):
+                try:
+                    self.sweep()
+                    if on_sweep is not None:
+                        on_sweep()
+                except Exception as e:
+                    logging.error(f"Error sweeping artifacts: {e}")
+
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=run, name='artifact-sweeper', daemon=True)
+        self._sweeper.start()
+        return self._sweeper
+
+    def stop_sweeper(self):
+        """Stop the background sweeper"""
+        self._stop_event.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Offline Batch Processor for Safety Detection
+Walks a directory of images and videos, runs detection in a process pool
+and appends the results to a CSV, JSONL or Parquet file. A manifest next
+to the output records finished files so an interrupted run can resume.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from config import Config
+from utils import allowed_file
+
+RESULT_COLUMNS = ['file', 'frame', 'position_ms', 'class', 'confidence', 'x1', 'y1', 'x2', 'y2']
+
+
+def find_media_files(input_dir):
+    """Walk input_dir and return sorted relative paths of images and videos"""
+    media = []
+    extensions = Config.ALLOWED_IMAGE_EXTENSIONS | Config.ALLOWED_VIDEO_EXTENSIONS
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if allowed_file(filename, extensions):
+                path = os.path.join(root, filename)
+                media.append(os.path.relpath(path, input_dir))
+    return media
+
+
+def file_signature(path):
+    """Get (size, mtime) used to detect files that changed since the manifest"""
+    stat = os.stat(path)
+    return stat.st_size, int(stat.st_mtime)
+
+
+class JsonlWriter:
+    """Append detection rows as JSON lines"""
+
+    def __init__(self, path):
+        self.path = path
+        self._buffer = []
+
+    def truncate(self, offset):
+        """Drop anything written after the last committed offset"""
+        if os.path.exists(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+    def add(self, rows):
+        self._buffer.extend(rows)
+
+    def _write(self, f, rows):
+        for row in rows:
+            f.write(json.dumps(dict(zip(RESULT_COLUMNS, row))) + '\n')
+
+    def commit(self):
+        """Append buffered rows durably and return the new offset"""
+        with open(self.path, 'a', newline='') as f:
+            self._write(f, self._buffer)
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        self._buffer = []
+        return offset
+
+
+class CsvWriter(JsonlWriter):
+    """Append detection rows as CSV"""
+
+    def _write(self, f, rows):
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow(RESULT_COLUMNS)
+        writer.writerows(rows)
+
+
+class ParquetWriter:
+    """Write each commit as one Parquet part file in a directory"""
+
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("❌ Parquet output requires pyarrow (pip install pyarrow)")
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith('part-'))
+
+    def truncate(self, offset):
+        """Remove part files written after the last committed part"""
+        for name in self._parts()[offset:]:
+            os.remove(os.path.join(self.path, name))
+
+    def add(self, rows):
+        self._buffer.extend(rows)
+
+    def commit(self):
+        """Write buffered rows as a new part file and return the part count"""
+        count = len(self._parts())
+        if self._buffer:
+            columns = list(zip(*self._buffer))
+            table = self._pa.table({name: list(values) for name, values in zip(RESULT_COLUMNS, columns)})
+            self._pq.write_table(table, os.path.join(self.path, f"part-{count:05d}.parquet"))
+            count += 1
+        self._buffer = []
+        return count
+
+
+WRITERS = {
+    'jsonl': JsonlWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter
+}
+
+
+class Manifest:
+    """Append-only record of finished files and the committed output offset"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.offset = 0
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted write
+                        break
+                    self.entries[entry['file']] = entry
+                    self.offset = entry['offset']
+
+    def is_done(self, relative_path, signature, retry_errors=False):
+        entry = self.entries.get(relative_path)
+        if entry is None or [entry['size'], entry['mtime']] != list(signature):
+            return False
+        return not (retry_errors and entry.get('error'))
+
+    def append(self, entries, offset):
+        """Durably record entries as committed up to offset"""
+        with open(self.path, 'a') as f:
+            for entry in entries:
+                entry['offset'] = offset
+                f.write(json.dumps(entry) + '\n')
+                self.entries[entry['file']] = entry
+            f.flush()
+            os.fsync(f.fileno())
+        self.offset = offset
+
+
+def _init_worker(model_path, threads):
+    """Load the model once per worker process"""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+    import detector
+    if not detector.load_model(model_path):
+        raise RuntimeError(f"Cannot load model {model_path}")
+
+
+def _process_file(input_dir, relative_path, confidence, video_stride):
+    """Detect objects in one image or video and return (path, rows, frames, error)"""
+    import cv2
+    from PIL import Image
+    from detector import process_image
+
+    path = os.path.join(input_dir, relative_path)
+    rows = []
+
+    try:
+        if allowed_file(relative_path, Config.ALLOWED_IMAGE_EXTENSIONS):
+            image = Image.open(path).convert('RGB')
+            detections, error = process_image(image, confidence)
+            if error:
+                return relative_path, [], 1, error
+            for d in detections:
+                rows.append([relative_path, None, None, d['class'], d['confidence'], *d['bbox']])
+            return relative_path, rows, 1, None
+
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            return relative_path, [], 0, "Cannot open video"
+
+        frame_index = frames = 0
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if frame_index % video_stride == 0:
+                    position_ms = int(cap.get(cv2.CAP_PROP_POS_MSEC))
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    detections, error = process_image(Image.fromarray(frame_rgb), confidence)
+                    if error:
+                        return relative_path, [], frames, error
+                    for d in detections:
+                        rows.append([relative_path, frame_index, position_ms,
+                                     d['class'], d['confidence'], *d['bbox']])
+                    frames += 1
+                frame_index += 1
+        finally:
+            cap.release()
+        return relative_path, rows, frames, None
+
+    except Exception as e:
+        return relative_path, [], 0, str(e)
+
+
+def run_batch(args):
+    """Process every pending file under args.input and report progress"""
+    output = args.output or args.input.rstrip(os.sep) + f"_results.{args.format}"
+    manifest = Manifest(args.manifest or output + '.manifest')
+    writer = WRITERS[args.format](output)
+    writer.truncate(manifest.offset)
+
+    files = find_media_files(args.input)
+    pending = []
+    for relative_path in files:
+        signature = file_signature(os.path.join(args.input, relative_path))
+        if not manifest.is_done(relative_path, signature, args.retry_errors):
+            pending.append((relative_path, signature))
+
+    print("=" * 60)
+    print("🗂️  Safety Detection Batch Processor")
+    print("=" * 60)
+    print(f"Input: {args.input}")
+    print(f"Output: {output} ({args.format})")
+    print(f"Files: {len(files)} found, {len(files) - len(pending)} already done, {len(pending)} to process")
+    print(f"Workers: {args.workers} x {args.threads} threads")
+    print("=" * 60)
+
+    if not pending:
+        print("✅ Nothing to do")
+        return 0
+
+    started = time.time()
+    last_report = last_commit = started
+    done = frames_total = detections_total = errors = 0
+    uncommitted = []
+    signatures = dict(pending)
+    queue = iter(pending)
+    in_flight = set()
+
+    def commit():
+        nonlocal last_commit
+        offset = writer.commit()
+        manifest.append(uncommitted, offset)
+        uncommitted.clear()
+        last_commit = time.time()
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.model, args.threads)) as executor:
+        def submit_next():
+            for relative_path, _ in queue:
+                in_flight.add(executor.submit(_process_file, args.input, relative_path,
+                                              args.confidence, args.video_stride))
+                return True
+            return False
+
+        for _ in range(args.workers * 2):
+            if not submit_next():
+                break
+
+        try:
+            while in_flight:
+                finished, _ = wait(in_flight, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    in_flight.discard(future)
+                    relative_path, rows, frames, error = future.result()
+                    size, mtime = signatures[relative_path]
+
+                    writer.add(rows)
+                    uncommitted.append({
+                        "file": relative_path,
+                        "size": size,
+                        "mtime": mtime,
+                        "frames": frames,
+                        "detections": len(rows),
+                        "error": error
+                    })
+                    done += 1
+                    frames_total += frames
+                    detections_total += len(rows)
+                    if error:
+                        errors += 1
+                        print(f"⚠️  {relative_path}: {error}")
+                    submit_next()
+
+                now = time.time()
+                if len(uncommitted) >= args.flush_every or (uncommitted and now - last_commit >= args.flush_interval):
+                    commit()
+                if now - last_report >= args.progress_interval:
+                    last_report = now
+                    elapsed = now - started
+                    rate = done / elapsed if elapsed else 0
+                    eta = (len(pending) - done) / rate if rate else 0
+                    print(f"⏳ {done}/{len(pending)} files | {rate:.2f} files/s | "
+                          f"{frames_total / elapsed:.1f} frames/s | {detections_total} detections | "
+                          f"ETA {eta:.0f}s")
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted, saving progress...")
+            for future in in_flight:
+                future.cancel()
+            if uncommitted:
+                commit()
+            return 130
+
+    if uncommitted:
+        commit()
+
+    elapsed = time.time() - started
+    print("=" * 60)
+    print(f"✅ Processed {done} files ({frames_total} frames) in {elapsed:.1f}s")
+    print(f"Throughput: {done / elapsed:.2f} files/s, {frames_total / elapsed:.1f} frames/s")
+    print(f"Detections: {detections_total}, Errors: {errors}")
+    print("=" * 60)
+    return 1 if errors else 0
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Resumable offline batch detection for images and videos")
+    parser.add_argument('input', help="Directory to process (walked recursively)")
+    parser.add_argument('-o', '--output', help="Output file (directory for parquet)")
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='csv', help="Output format")
+    parser.add_argument('-m', '--model', default=None, help="Model path (default: server default model)")
+    parser.add_argument('-c', '--confidence', type=float, default=Config.DEFAULT_CONFIDENCE_THRESHOLD)
+    parser.add_argument('-w', '--workers', type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="Worker processes")
+    parser.add_argument('--threads', type=int, default=2, help="Torch threads per worker")
+    parser.add_argument('--video-stride', type=int, default=1, help="Process every Nth video frame")
+    parser.add_argument('--manifest', help="Manifest path (default: <output>.manifest)")
+    parser.add_argument('--flush-every', type=int, default=50, help="Commit after this many files")
+    parser.add_argument('--flush-interval', type=float, default=30.0, help="Commit at least this often (seconds)")
+    parser.add_argument('--progress-interval', type=float, default=10.0, help="Progress report interval (seconds)")
+    parser.add_argument('--retry-errors', action='store_true', help="Reprocess files that failed previously")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f"❌ Input directory not found: {args.input}")
+        sys.exit(2)
+
+    sys.exit(run_batch(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency regression benchmark for Safety Detection
+Runs the serving code path over a local labeled validation set (YOLO
+format: images/ plus labels/ with one `class cx cy w h` line per box) and
+reports per-class precision, recall and mAP with per-image latency (timed
+at the serving confidence) and peak memory. Compared against a stored baseline with configurable
+tolerances, it fails when an optimization silently costs accuracy or speed.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+from config import Config
+from utils import allowed_file
+
+IOU_THRESHOLDS = [0.5 + 0.05 * step for step in range(10)]
+
+
+def find_validation_set(images_dir, labels_dir=None):
+    """Pair every image under images_dir with its label file path
+
+    Labels default to the ultralytics layout, where .../images/... maps to
+    .../labels/... with a .txt extension. A missing label file means the
+    image has no objects.
+    """
+    if labels_dir is None:
+        parent, name = os.path.split(os.path.normpath(images_dir))
+        labels_dir = os.path.join(parent, 'labels' if name == 'images' else name + '_labels')
+
+    pairs = []
+    for root, dirs, files in os.walk(images_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if allowed_file(filename, Config.ALLOWED_IMAGE_EXTENSIONS):
+                image_path = os.path.join(root, filename)
+                relative = os.path.relpath(image_path, images_dir)
+                label_path = os.path.join(labels_dir, os.path.splitext(relative)[0] + '.txt')
+                pairs.append((image_path, label_path))
+    return pairs
+
+
+def load_labels(label_path, width, height):
+    """Read YOLO-format labels as [(class name, [x1, y1, x2, y2])] in pixels"""
+    boxes = []
+    if not os.path.exists(label_path):
+        return boxes
+    with open(label_path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cls = int(parts[0])
+            cx, cy, w, h = (float(value) for value in parts[1:5])
+            boxes.append((Config.CLASS_LABELS.get(cls, str(cls)), [
+                (cx - w / 2) * width, (cy - h / 2) * height,
+                (cx + w / 2) * width, (cy + h / 2) * height
+            ]))
+    return boxes
+
+
+def dataset_fingerprint(pairs):
+    """Hash of the image names and label contents, to tell whether two runs used the same set"""
+    digest = hashlib.sha256()
+    for image_path, label_path in pairs:
+        digest.update(os.path.basename(image_path).encode())
+        if os.path.exists(label_path):
+            with open(label_path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def box_iou(box, boxes):
+    """IoU of one [x1, y1, x2, y2] box against an (N, 4) array"""
+    import numpy as np
+
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def match_image(detections, truths):
+    """Match one image's detections of one class to its ground truth boxes
+
+    Returns (confidences, tp) where tp[i, t] says whether detection i is a
+    true positive at IOU_THRESHOLDS[t]. Detections are matched greedily in
+    confidence order to the best-overlapping unmatched box.
+    """
+    import numpy as np
+
+    detections = sorted(detections, key=lambda d: d['confidence'], reverse=True)
+    confidences = np.array([d['confidence'] for d in detections], dtype=float)
+    tp = np.zeros((len(detections), len(IOU_THRESHOLDS)), dtype=bool)
+    if not detections or not truths:
+        return confidences, tp
+
+    truth_boxes = np.array(truths, dtype=float)
+    ious = np.array([box_iou(d['bbox'], truth_boxes) for d in detections])
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        matched = np.zeros(len(truths), dtype=bool)
+        for i in range(len(detections)):
+            candidates = np.where((ious[i] >= threshold) & ~matched, ious[i], -1)
+            best = int(candidates.argmax())
+            if candidates[best] >= 0:
+                matched[best] = True
+                tp[i, t] = True
+    return confidences, tp
+
+
+def average_precision(confidences, tp, instances):
+    """101-point interpolated AP for one IoU threshold"""
+    import numpy as np
+
+    if instances == 0 or len(confidences) == 0:
+        return 0.0
+    order = np.argsort(-confidences, kind='stable')
+    hits = tp[order]
+    cumulative_tp = np.cumsum(hits)
+    cumulative_fp = np.cumsum(~hits)
+    recall = cumulative_tp / instances
+    precision = cumulative_tp / (cumulative_tp + cumulative_fp)
+    # Precision envelope: best precision at this recall or any higher one
+    envelope = np.maximum.accumulate(precision[::-1])[::-1]
+    points = np.searchsorted(recall, np.linspace(0, 1, 101), side='left')
+    return float(np.mean([envelope[i] if i < len(envelope) else 0.0 for i in points]))
+
+
+def class_metrics(confidences, tp, instances, operating_confidence):
+    """Precision and recall at the serving threshold plus AP50 and AP50-95"""
+    import numpy as np
+
+    kept = confidences >= operating_confidence
+    true_positives = int(tp[kept, 0].sum())
+    predicted = int(kept.sum())
+    aps = [average_precision(confidences, tp[:, t], instances) for t in range(len(IOU_THRESHOLDS))]
+    return {
+        "instances": instances,
+        "predictions": predicted,
+        "precision": round(true_positives / predicted, 4) if predicted else 0.0,
+        "recall": round(true_positives / instances, 4) if instances else 0.0,
+        "ap50": round(aps[0], 4),
+        "ap50_95": round(float(np.mean(aps)), 4)
+    }
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def run_images(pairs, confidence):
+    """Detect each image the way /api/detect/image does; yield (pair, size, detections, ms)"""
+    from PIL import Image
+    from detector import process_image
+
+    for image_path, label_path in pairs:
+        started = time.perf_counter()
+        with open(image_path, 'rb') as f:
+            image = Image.open(f)
+            image.load()
+        detections, error = process_image(image, confidence)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        yield (image_path, label_path), image.size, detections, error, elapsed_ms
+
+
+def run_bulk(pairs, confidence, batch_size, imgsz):
+    """Detect images the way /api/detect/batch does: cv2 decode, batched forward pass"""
+    from bulk import decode_image
+    from detector import process_images
+
+    for start in range(0, len(pairs), batch_size):
+        chunk = pairs[start:start + batch_size]
+        started = time.perf_counter()
+        images = [decode_image(lambda path=image_path: _read_bytes(path)) for image_path, _ in chunk]
+        decoded = [image for image in images if image is not None]
+        results, error = process_images(decoded, confidence, imgsz=imgsz) if decoded else ([], None)
+        per_image_ms = (time.perf_counter() - started) * 1000 / len(chunk)
+
+        results = iter(results or [])
+        for pair, image in zip(chunk, images):
+            if image is None:
+                yield pair, None, None, "Cannot decode image", per_image_ms
+                continue
+            height, width = image.shape[:2]
+            yield pair, (width, height), None if error else next(results), error, per_image_ms
+
+
+def run_passes(pairs, args, confidence):
+    """Run the validation set through the configured serving path once"""
+    if args.mode == 'bulk':
+        return run_bulk(pairs, confidence, args.batch_size, args.imgsz)
+    return run_images(pairs, confidence)
+
+
+def evaluate(pairs, args):
+    """Run the validation set through the serving path and compute the report"""
+    import numpy as np
+    from model_profile import file_hash, rss_mb, peak_rss_mb
+
+    classes = list(Config.CLASS_LABELS.values())
+    per_class = {name: {"confidences": [], "tp": [], "instances": 0} for name in classes}
+    latencies = []
+    failed = []
+
+    rss_before = rss_mb()
+    # The accuracy pass keeps near-zero-confidence boxes for the PR curve,
+    # which makes NMS and postprocessing slower than in serving. Latency is
+    # timed in a separate pass at the operating confidence instead.
+    timed = args.eval_confidence == args.confidence
+    for (image_path, label_path), size, detections, error, elapsed_ms in run_passes(pairs, args, args.eval_confidence):
+        if error:
+            failed.append({"image": image_path, "error": error})
+            continue
+        if timed:
+            latencies.append(elapsed_ms)
+        truths = load_labels(label_path, *size)
+        for name in classes:
+            class_truths = [box for cls, box in truths if cls == name]
+            confidences, tp = match_image([d for d in detections if d['class'] == name], class_truths)
+            per_class[name]["confidences"].append(confidences)
+            per_class[name]["tp"].append(tp)
+            per_class[name]["instances"] += len(class_truths)
+
+    if not timed:
+        latencies = [elapsed_ms for _, _, _, error, elapsed_ms in run_passes(pairs, args, args.confidence)
+                     if not error]
+
+    metrics = {}
+    for name, collected in per_class.items():
+        confidences = np.concatenate(collected["confidences"]) if collected["confidences"] else np.zeros(0)
+        tp = np.concatenate(collected["tp"]) if collected["tp"] else np.zeros((0, len(IOU_THRESHOLDS)), bool)
+        metrics[name] = class_metrics(confidences, tp, collected["instances"], args.confidence)
+
+    scored = [m for m in metrics.values() if m["instances"]]
+    overall = {
+        key: round(float(np.mean([m[key] for m in scored])), 4) if scored else 0.0
+        for key in ("precision", "recall", "ap50", "ap50_95")
+    }
+
+    return {
+        "model": os.path.basename(args.model),
+        "model_hash": file_hash(args.model)[:16],
+        "dataset": {"images": len(pairs), "fingerprint": dataset_fingerprint(pairs)},
+        "mode": args.mode,
+        "imgsz": args.imgsz if args.mode == 'bulk' else None,
+        "operating_confidence": args.confidence,
+        "eval_confidence": args.eval_confidence,
+        "classes": metrics,
+        "overall": overall,
+        "latency": {
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50_ms": round(_percentile(latencies, 0.5), 2) if latencies else None,
+            "p90_ms": round(_percentile(latencies, 0.9), 2) if latencies else None,
+            "p99_ms": round(_percentile(latencies, 0.99), 2) if latencies else None,
+            "max_ms": round(max(latencies), 2) if latencies else None
+        },
+        "memory": {
+            "rss_before_mb": round(rss_before, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1)
+        },
+        "failed": failed
+    }
+
+
+def compare(report, baseline, tolerances):
+    """List every metric that regressed beyond its tolerance"""
+    failures = []
+
+    def check_drop(label, current, previous):
+        if previous is not None and current is not None and previous - current > tolerances["accuracy"]:
+            failures.append(f"{label} dropped {previous:.4f} -> {current:.4f}")
+
+    def check_increase(label, current, previous, tolerance):
+        if previous and current is not None and current > previous * (1 + tolerance):
+            failures.append(f"{label} rose {previous} -> {current} (> {tolerance:.0%})")
+
+    for key in ("ap50", "ap50_95", "precision", "recall"):
+        check_drop(f"overall {key}", report["overall"][key], baseline["overall"].get(key))
+        for name, metrics in report["classes"].items():
+            previous = baseline["classes"].get(name, {})
+            check_drop(f"{name} {key}", metrics[key], previous.get(key))
+
+    for key in ("p50_ms", "p90_ms"):
+        check_increase(f"latency {key}", report["latency"][key], baseline["latency"].get(key),
+                       tolerances["latency"])
+    check_increase("peak_rss_mb", report["memory"]["peak_rss_mb"], baseline["memory"].get("peak_rss_mb"),
+                   tolerances["memory"])
+
+    if len(report["failed"]) > len(baseline.get("failed", [])):
+        failures.append(f"{len(report['failed'])} images failed (baseline {len(baseline.get('failed', []))})")
+    return failures
+
+
+def print_report(report):
+    print("=" * 72)
+    print("🎯 Safety Detection Accuracy & Latency Benchmark")
+    print("=" * 72)
+    print(f"Model: {report['model']} ({report['model_hash']}), mode: {report['mode']}")
+    print(f"Images: {report['dataset']['images']} ({report['dataset']['fingerprint']}), "
+          f"failed: {len(report['failed'])}")
+    print(f"P/R at confidence {report['operating_confidence']}, AP from {report['eval_confidence']}")
+    print(f"{'class':<10} {'inst':>6} {'P':>8} {'R':>8} {'AP50':>8} {'AP50-95':>8}")
+    for name, m in report["classes"].items():
+        print(f"{name:<10} {m['instances']:>6} {m['precision']:>8} {m['recall']:>8} "
+              f"{m['ap50']:>8} {m['ap50_95']:>8}")
+    o = report["overall"]
+    print(f"{'all':<10} {'':>6} {o['precision']:>8} {o['recall']:>8} {o['ap50']:>8} {o['ap50_95']:>8}")
+    latency = report["latency"]
+    print(f"Latency per image at confidence {report['operating_confidence']}: mean {latency['mean_ms']} ms, "
+          f"p50 {latency['p50_ms']} ms, p90 {latency['p90_ms']} ms, max {latency['max_ms']} ms")
+    print(f"Peak RSS: {report['memory']['peak_rss_mb']} MB")
+    print("=" * 72)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Accuracy and latency regression check on a labeled image set")
+    parser.add_argument('images', help="Directory of validation images")
+    parser.add_argument('--labels', help="Directory of YOLO label files (default: sibling 'labels' dir)")
+    parser.add_argument('-m', '--model', default=os.path.join(Config.MODEL_DIR, Config.DEFAULT_MODEL))
+    parser.add_argument('--mode', choices=['image', 'bulk'], default='image',
+                        help="Serving path: /api/detect/image (PIL, one at a time) or /api/detect/batch")
+    parser.add_argument('--batch-size', type=int, default=Config.BULK_BATCH_SIZE, help="Batch size in bulk mode")
+    parser.add_argument('--imgsz', type=int, default=None, help="Inference resolution in bulk mode")
+    parser.add_argument('-c', '--confidence', type=float, default=Config.DEFAULT_CONFIDENCE_THRESHOLD,
+                        help="Serving threshold for precision/recall")
+    parser.add_argument('--eval-confidence', type=float, default=0.001,
+                        help="Threshold used for inference so mAP sees the full PR curve")
+    parser.add_argument('--baseline', default='eval_baseline.json', help="Baseline report to compare against")
+    parser.add_argument('--update-baseline', action='store_true', help="Save this run as the new baseline")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01,
+                        help="Allowed absolute drop in any AP, precision or recall")
+    parser.add_argument('--max-latency-increase', type=float, default=0.2,
+                        help="Allowed relative increase in p50/p90 latency")
+    parser.add_argument('--max-memory-increase', type=float, default=0.2,
+                        help="Allowed relative increase in peak memory")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.images):
+        print(f"❌ Image directory not found: {args.images}")
+        sys.exit(2)
+    pairs = find_validation_set(args.images, args.labels)
+    if not pairs:
+        print(f"❌ No images found in {args.images}")
+        sys.exit(2)
+
+    import detector
+    if not detector.load_model(args.model, warm=True):
+        print(f"❌ Cannot load model {args.model}: {detector.model_error}")
+        sys.exit(2)
+
+    report = evaluate(pairs, args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --update-baseline to create one")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["dataset"]["fingerprint"] != report["dataset"]["fingerprint"]:
+        print("⚠️  Validation set differs from the baseline's; accuracy is not directly comparable")
+    if baseline.get("model_hash") != report["model_hash"]:
+        print(f"⚠️  Comparing model {report['model_hash']} against baseline model {baseline.get('model_hash')}")
+
+    failures = compare(report, baseline, {
+        "accuracy": args.max_accuracy_drop,
+        "latency": args.max_latency_increase,
+        "memory": args.max_memory_increase
+    })
+    for failure in failures:
+        print(f"❌ Regression: {failure}")
+    if not failures:
+        print("✅ No regression against baseline")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Capture transport benchmark for Safety Detection Dashboard
+Runs the live pipeline (capture -> SourceManager -> consumer) over a
+synthetic video at several resolutions and compares the in-process capture
+thread with a pickling multiprocessing queue and the shared-memory frame
+ring. For each it reports consumed FPS, capture-to-consumer lag, CPU the
+serving process spends per frame and how much GIL time is left for a
+concurrent Python thread (a stand-in for the web threads).
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+from sources import SourceManager, VideoSource, SharedMemoryVideoSource
+
+TRANSPORTS = ('thread', 'queue', 'shared_memory')
+
+
+class _QueueCapture(VideoSource):
+    """Capture loop for the queue transport, run inside the capture process"""
+
+    def __init__(self, frames, *args, **kwargs):
+        self.frames = frames
+        super().__init__(*args, **kwargs)
+
+    def _read(self, cap):
+        ret, frame = cap.read()
+        if not ret:
+            return False
+        try:
+            self.frames.put_nowait((frame, time.time()))
+        except queue.Full:
+            pass
+        return True
+
+
+def _run_queue_capture(frames, source_id, uri, stop_event):
+    capture = _QueueCapture(frames, source_id, uri)
+    capture._stop_event = stop_event
+    capture._run(lambda: None)
+
+
+class QueueVideoSource(VideoSource):
+    """Capture in a child process and pickle every frame through a multiprocessing.Queue"""
+
+    transport = "queue"
+
+    def start(self, on_frame):
+        context = multiprocessing.get_context('spawn')
+        self._frames = context.Queue(maxsize=2)
+        self._process_stop = context.Event()
+        self._process = context.Process(target=_run_queue_capture,
+                                        args=(self._frames, self.source_id, self.uri, self._process_stop),
+                                        daemon=True)
+        self._process.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._relay, args=(on_frame,), daemon=True)
+        self._thread.start()
+
+    def _relay(self, on_frame):
+        while not self._stop_event.is_set():
+            try:
+                frame, frame_time = self._frames.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self.frame = frame
+            self.frame_time = frame_time
+            self.frame_seq += 1
+            self.frames_captured += 1
+            self._capture_times.append(time.time())
+            on_frame()
+
+    def stop(self):
+        self._stop_event.set()
+        self._process_stop.set()
+        self._thread.join(timeout=5)
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+def write_test_video(path, width, height, fps, frames=90):
+    """Write a moving-gradient MJPG video so decoding costs what a real camera frame does"""
+    import cv2
+    import numpy as np
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError("Cannot write test video (OpenCV without MJPG support?)")
+    rng = np.random.default_rng(0)
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+    base[..., 0] = np.linspace(0, 255, width, dtype=np.uint8)
+    base[..., 1] = np.linspace(0, 255, height, dtype=np.uint8)[:, None]
+    noise = rng.integers(0, 32, (height, width, 3), dtype=np.uint8)
+    for index in range(frames):
+        frame = np.roll(base, index * 8, axis=1) + noise
+        cv2.rectangle(frame, (index * 5 % width, height // 3), (index * 5 % width + 80, height // 3 + 160),
+                      (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def _gil_probe(stop_event, counter):
+    """Count pure-Python loop iterations, which only advance while holding the GIL
+
+    counter receives [iterations, CPU seconds used by the probe itself].
+    """
+    count = 0
+    cpu_started = time.thread_time()
+    while not stop_event.is_set():
+        for _ in range(1000):
+            count += 1
+        counter[0] = count
+    counter[1] = time.thread_time() - cpu_started
+
+
+def probe_rate(duration):
+    """Iterations per second the probe reaches with nothing else running"""
+    stop_event = threading.Event()
+    counter = [0, 0.0]
+    thread = threading.Thread(target=_gil_probe, args=(stop_event, counter), daemon=True)
+    thread.start()
+    time.sleep(duration)
+    stop_event.set()
+    thread.join()
+    return counter[0] / duration
+
+
+def run_transport(transport, video_path, fps, duration, ring_shape, baseline_probe):
+    """Run the live pipeline on one transport and return its measurements"""
+    import cv2
+
+    consumed = []
+    lags = []
+
+    def consume(frames):
+        # Stand-in for preprocessing: reads every pixel of the frame in place
+        for frame in frames:
+            cv2.resize(frame, (640, 360), interpolation=cv2.INTER_AREA)
+        return [[] for _ in frames], None
+
+    def on_result(source_id, frame, detections, frame_time, inferred=True):
+        now = time.time()
+        consumed.append(now)
+        lags.append(now - frame_time)
+
+    manager = SourceManager(consume, on_result=on_result)
+    if transport == 'thread':
+        source = VideoSource('bench', video_path, fps=fps)
+    elif transport == 'queue':
+        source = QueueVideoSource('bench', video_path, fps=fps)
+    else:
+        source = SharedMemoryVideoSource('bench', video_path, fps=fps, max_shape=ring_shape)
+    manager.sources['bench'] = source
+    manager.start()
+
+    # Let the capture process spawn and the file start looping before measuring
+    warmup_deadline = time.time() + 10
+    while not consumed and time.time() < warmup_deadline:
+        time.sleep(0.05)
+    time.sleep(0.5)
+
+    stop_event = threading.Event()
+    counter = [0, 0.0]
+    probe = threading.Thread(target=_gil_probe, args=(stop_event, counter), daemon=True)
+    consumed.clear()
+    lags.clear()
+    cpu_started = time.process_time()
+    started = time.time()
+    probe.start()
+    time.sleep(duration)
+    stop_event.set()
+    probe.join()
+    elapsed = time.time() - started
+    cpu = time.process_time() - cpu_started - counter[1]
+    frames = len(consumed)
+    lag_sample = sorted(lags[:frames])
+    manager.stop()
+
+    return {
+        "transport": transport,
+        "fps": round(frames / elapsed, 1),
+        "lag_ms": round(sum(lag_sample) / len(lag_sample) * 1000, 2) if lag_sample else None,
+        "p95_lag_ms": round(lag_sample[int(len(lag_sample) * 0.95)] * 1000, 2) if lag_sample else None,
+        "cpu_ms_per_frame": round(cpu * 1000 / frames, 2) if frames else None,
+        "gil_headroom": round(counter[0] / elapsed / baseline_probe, 3) if baseline_probe else None
+    }
+
+
+def parse_resolution(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark capture transports at several resolutions")
+    parser.add_argument('--resolutions', default='640x480,1280x720,1920x1080',
+                        help="Comma-separated WIDTHxHEIGHT list")
+    parser.add_argument('--transports', default=','.join(TRANSPORTS), help="Comma-separated transports")
+    parser.add_argument('--fps', type=int, default=30, help="Frame rate of the synthetic source")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds measured per run")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    transports = [name.strip() for name in args.transports.split(',') if name.strip()]
+    unknown = set(transports) - set(TRANSPORTS)
+    if unknown:
+        print(f"❌ Unknown transports: {', '.join(sorted(unknown))}")
+        sys.exit(2)
+
+    baseline_probe = probe_rate(min(args.duration, 2.0))
+    workdir = tempfile.mkdtemp(prefix='frame_ring_bench_')
+    report = []
+    try:
+        for resolution in args.resolutions.split(','):
+            width, height = parse_resolution(resolution)
+            video_path = os.path.join(workdir, f"bench_{width}x{height}.avi")
+            write_test_video(video_path, width, height, args.fps)
+            for transport in transports:
+                result = run_transport(transport, video_path, args.fps, args.duration,
+                                       (height, width, 3), baseline_probe)
+                result["resolution"] = f"{width}x{height}"
+                report.append(result)
+                if not args.json:
+                    print(f"  {result['resolution']:>10} {transport:<14} done")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 78)
+    print("🎞️  Capture Transport Benchmark")
+    print("=" * 78)
+    print(f"Source: synthetic MJPG at {args.fps} FPS, {args.duration:.0f}s per run")
+    print(f"{'resolution':>10} {'transport':<14} {'fps':>6} {'lag ms':>8} {'p95 ms':>8} "
+          f"{'cpu ms/frame':>13} {'GIL headroom':>13}")
+    for result in report:
+        headroom = f"{result['gil_headroom'] * 100:.0f}%" if result['gil_headroom'] is not None else "-"
+        print(f"{result['resolution']:>10} {result['transport']:<14} {result['fps']:>6} "
+              f"{result['lag_ms'] or '-':>8} {result['p95_lag_ms'] or '-':>8} "
+              f"{result['cpu_ms_per_frame'] or '-':>13} {headroom:>13}")
+    print("=" * 78)
+    print("cpu ms/frame is CPU used by this (serving) process only; decoding in a")
+    print("capture process moves that work off the process that runs the web threads.")
+
+
+if __name__ == '__main__':
+    main()
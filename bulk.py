@@ -0,0 +1,153 @@
+"""
+Bulk image detection for Safety Detection Dashboard
+"""
+
+import os
+import time
+import shutil
+import zipfile
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import allowed_file
+
+
+def iter_archive_images(archive, allowed_extensions, max_image_bytes):
+    """Yield (name, reader) for image members of a zip archive
+
+    Members are read lazily by the decode workers, so only the images in
+    flight are ever held in memory.
+    """
+    for info in archive.infolist():
+        if info.is_dir() or not allowed_file(info.filename, allowed_extensions):
+            continue
+        if info.file_size > max_image_bytes:
+            yield info.filename, None
+            continue
+        yield info.filename, (lambda info=info: archive.read(info))
+
+
+def spool_upload(file, directory):
+    """Copy an uploaded file to a temp file in directory and return its path
+
+    Results are streamed after the view returns, when the request body may
+    already be closed, so uploads are moved to disk before that happens.
+    """
+    suffix = os.path.splitext(file.filename or '')[1]
+    fd, path = tempfile.mkstemp(prefix='temp_bulk_', suffix=suffix, dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        shutil.copyfileobj(file.stream, f)
+    return path
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def iter_uploaded_images(uploads):
+    """Yield (name, reader) for (name, path) pairs of spooled image uploads"""
+    for name, path in uploads:
+        yield name, (lambda path=path: read_file(path))
+
+
+def decode_image(reader):
+    """Read and decode one image to a BGR array, or None on failure
+
+    cv2.imdecode releases the GIL, so a thread pool decodes in parallel.
+    """
+    import cv2
+    import numpy as np
+
+    if reader is None:
+        return None
+    data = np.frombuffer(reader(), dtype=np.uint8)
+    if data.size == 0:
+        return None
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def run_bulk_detection(items, detect_batch, batch_size=8, workers=4, max_in_flight=32, on_result=None):
+    """Decode images in parallel and detect them in batches, yielding results in order
+
+    At most max_in_flight images are read or decoded at any time regardless
+    of how many items there are. While one batch is in the model the pool
+    keeps decoding the next ones.
+    """
+    items = iter(items)
+    pending = deque()
+    processed = failed = 0
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def fill():
+            while len(pending) < max_in_flight:
+                try:
+                    name, reader = next(items)
+                except StopIteration:
+                    return
+                pending.append((name, executor.submit(decode_image, reader)))
+
+        fill()
+        while pending:
+            batch = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+            fill()
+
+            # Failures are held with the rest of the batch so every result
+            # is yielded in upload order
+            ordered = [None] * len(batch)
+            decoded = []
+            for slot, (name, future) in enumerate(batch):
+                try:
+                    image = future.result()
+                except Exception as e:
+                    ordered[slot] = {"name": name, "error": f"Cannot read image: {e}"}
+                    continue
+                if image is None:
+                    ordered[slot] = {"name": name, "error": "Cannot decode image"}
+                    continue
+                decoded.append((slot, name, image))
+
+            if decoded:
+                batch_started = time.perf_counter()
+                results, error = detect_batch([image for _, _, image in decoded])
+                batch_ms = (time.perf_counter() - batch_started) * 1000
+
+                for index, (slot, name, image) in enumerate(decoded):
+                    if error:
+                        ordered[slot] = {"name": name, "error": error}
+                        continue
+
+                    result = {
+                        "name": name,
+                        "detections": results[index],
+                        "total_detections": len(results[index]),
+                        "batch_ms": round(batch_ms, 1)
+                    }
+                    if on_result is not None:
+                        on_result(result, image)
+                    ordered[slot] = result
+
+            for result in ordered:
+                if "error" in result:
+                    failed += 1
+                else:
+                    processed += 1
+                yield result
+
+    yield {
+        "done": True,
+        "processed": processed,
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def open_archive(path):
+    """Open a spooled zip archive, returning None if it is not one"""
+    try:
+        return zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        return None
+
@@ -15,24 +15,86 @@ class Config:
     MODEL_DIR = os.environ.get('MODEL_DIR', 'model')
     DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', 'BESTSModel.pt')
     
+    # Model Profiling Configuration
+    MODEL_PROFILE_DIR = os.environ.get('MODEL_PROFILE_DIR', os.path.join('data', 'model_profiles'))
+    MODEL_PROFILE_BATCH_SIZES = [int(b) for b in os.environ.get('MODEL_PROFILE_BATCH_SIZES', '1,4,8').split(',')]
+    MODEL_PROFILE_IMAGE_SIZES = [int(s) for s in os.environ.get('MODEL_PROFILE_IMAGE_SIZES', '640,416,320').split(',')]
+    MODEL_PROFILE_ITERATIONS = int(os.environ.get('MODEL_PROFILE_ITERATIONS', 10))
+    MODEL_PROFILE_TIMEOUT = int(os.environ.get('MODEL_PROFILE_TIMEOUT', 600))
+    
     # API Configuration
     API_HOST = os.environ.get('API_HOST', '0.0.0.0')
     API_PORT = int(os.environ.get('API_PORT', 5000))
     
     # File Upload Configuration
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB max request size
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
     ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
     ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'wmv'}
     
+    # Bulk Detection Configuration (raise MAX_CONTENT_LENGTH for large archives)
+    BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 8))
+    BULK_DECODE_WORKERS = int(os.environ.get('BULK_DECODE_WORKERS', 4))
+    BULK_MAX_IN_FLIGHT = int(os.environ.get('BULK_MAX_IN_FLIGHT', 32))
+    BULK_MAX_IMAGE_MB = int(os.environ.get('BULK_MAX_IMAGE_MB', 50))
+    
+    # Artifact Store Configuration
+    ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', 'outputs')
+    ARTIFACT_MAX_MB = int(os.environ.get('ARTIFACT_MAX_MB', 2048))
+    ARTIFACT_TTL_HOURS = float(os.environ.get('ARTIFACT_TTL_HOURS', 24))
+    ARTIFACT_SWEEP_INTERVAL = int(os.environ.get('ARTIFACT_SWEEP_INTERVAL', 300))
+    ARTIFACT_CACHE_MAX_AGE = int(os.environ.get('ARTIFACT_CACHE_MAX_AGE', 3600))
+    
     # Detection Configuration
     DEFAULT_CONFIDENCE_THRESHOLD = float(os.environ.get('DEFAULT_CONFIDENCE', 0.5))
     CLASS_LABELS = {0: "Helmet", 1: "Vest"}
     
+    # Event Store Configuration
+    EVENT_DB_PATH = os.environ.get('EVENT_DB_PATH', os.path.join('data', 'events.db'))
+    EVENT_BATCH_SIZE = int(os.environ.get('EVENT_BATCH_SIZE', 500))
+    EVENT_FLUSH_INTERVAL = float(os.environ.get('EVENT_FLUSH_INTERVAL', 1.0))
+    EVENT_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', 100000))
+    
     # Camera Configuration
     CAMERA_INDEX = int(os.environ.get('CAMERA_INDEX', 0))
     STREAM_FPS = int(os.environ.get('STREAM_FPS', 30))
     
+    # Multi-source Configuration
+    SOURCES_FILE = os.environ.get('SOURCES_FILE', 'sources.json')
+    INFERENCE_BATCH_SIZE = int(os.environ.get('INFERENCE_BATCH_SIZE', 8))
+    
+    # Capture Transport Configuration ('thread' or 'shared_memory')
+    CAPTURE_TRANSPORT = os.environ.get('CAPTURE_TRANSPORT', 'thread')
+    FRAME_RING_SLOTS = int(os.environ.get('FRAME_RING_SLOTS', 4))
+    FRAME_RING_MAX_WIDTH = int(os.environ.get('FRAME_RING_MAX_WIDTH', 1920))
+    FRAME_RING_MAX_HEIGHT = int(os.environ.get('FRAME_RING_MAX_HEIGHT', 1080))
+    
+    # Motion Gating Configuration
+    MOTION_GATING = os.environ.get('MOTION_GATING', 'True').lower() == 'true'
+    MOTION_WIDTH = int(os.environ.get('MOTION_WIDTH', 160))
+    MOTION_PIXEL_THRESHOLD = int(os.environ.get('MOTION_PIXEL_THRESHOLD', 25))
+    MOTION_MIN_AREA = float(os.environ.get('MOTION_MIN_AREA', 0.005))
+    MOTION_LEARNING_RATE = float(os.environ.get('MOTION_LEARNING_RATE', 0.05))
+    MOTION_MAX_SKIP = int(os.environ.get('MOTION_MAX_SKIP', 30))
+    
+    # Adaptive Quality Configuration
+    ADAPTIVE_QUALITY = os.environ.get('ADAPTIVE_QUALITY', 'True').lower() == 'true'
+    LATENCY_TARGET_MS = float(os.environ.get('LATENCY_TARGET_MS', 250))
+    QUALITY_TOLERANCE = float(os.environ.get('QUALITY_TOLERANCE', 0.2))
+    QUALITY_ADJUST_INTERVAL = float(os.environ.get('QUALITY_ADJUST_INTERVAL', 2.0))
+    QUALITY_UPGRADE_COOLDOWN = float(os.environ.get('QUALITY_UPGRADE_COOLDOWN', 10.0))
+    QUALITY_CPU_HIGH = float(os.environ.get('QUALITY_CPU_HIGH', 90))
+    QUALITY_CPU_LOW = float(os.environ.get('QUALITY_CPU_LOW', 60))
+    QUALITY_JPEG = [int(q) for q in os.environ.get('QUALITY_JPEG', '90,75,60').split(',')]
+    QUALITY_IMAGE_SIZES = [int(s) for s in os.environ.get('QUALITY_IMAGE_SIZES', '640,512,416,320').split(',')]
+    QUALITY_MAX_STRIDE = int(os.environ.get('QUALITY_MAX_STRIDE', 3))
+    QUALITY_MODELS = [m for m in os.environ.get('QUALITY_MODELS', '').split(',') if m]
+    
+    # Live Statistics Configuration
+    LIVE_STATS_WINDOW = int(os.environ.get('LIVE_STATS_WINDOW', 10))
+    LIVE_STATS_RECENT = int(os.environ.get('LIVE_STATS_RECENT', 10))
+    LIVE_STATS_PUBLISH_INTERVAL = float(os.environ.get('LIVE_STATS_PUBLISH_INTERVAL', 1.0))
+    
     # CORS Configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
     
@@ -46,6 +108,10 @@ class Config:
         # Create model directory if it doesn't exist
         if not os.path.exists(Config.MODEL_DIR):
             os.makedirs(Config.MODEL_DIR)
+        
+        # Create artifact directory if it doesn't exist
+        if not os.path.exists(Config.ARTIFACT_DIR):
+            os.makedirs(Config.ARTIFACT_DIR)
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -0,0 +1,132 @@
+"""
+YOLO model loading and detection for Safety Detection Dashboard
+"""
+
+import os
+import threading
+from config import Config
+import startup_profile
+
+# Global variables
+model = None
+model_loaded = False
+model_state = "not_loaded"
+model_error = None
+model_path = None
+CLASS_LABELS = {0: "Helmet", 1: "Vest"}
+inference_lock = threading.Lock()
+
+def default_model_path():
+    """Get the configured default model path"""
+    return os.path.join(Config.MODEL_DIR, Config.DEFAULT_MODEL)
+
+def create_model(path):
+    """Instantiate a YOLO model, importing ultralytics/torch on first use"""
+    with startup_profile.phase("import_ultralytics", once=True):
+        from ultralytics import YOLO
+    return YOLO(path)
+
+def warmup(warm_model=None, imgsz=640):
+    """Run one inference on a blank image so the first real request is not slow"""
+    import numpy as np
+    warm_model = warm_model or model
+    warm_model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), verbose=False)
+
+def load_model(path=None, warm=False):
+    """Load YOLO model"""
+    global model_loaded, model_state, model_error
+    path = path or default_model_path()
+    model_error = None
+    try:
+        model_state = "loading"
+        with startup_profile.phase("model_load"):
+            loaded = create_model(path)
+        if warm:
+            model_state = "warming"
+            with startup_profile.phase("model_warmup"):
+                warmup(loaded)
+        set_model(loaded, path)
+        print(f"✅ Model loaded successfully from {path}")
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        model_error = str(e)
+        # A failed reload keeps serving the previous model
+        model_state = "ready" if model is not None else "failed"
+        model_loaded = model is not None
+    return model_error is None
+
+def load_model_async(path=None, warm=True):
+    """Load and warm the model in a background thread"""
+    thread = threading.Thread(target=load_model, args=(path, warm), name='model-loader', daemon=True)
+    thread.start()
+    return thread
+
+def set_model(new_model, path=None):
+    """Replace the active model with an already loaded one"""
+    global model, model_loaded, model_state, model_path
+    with inference_lock:
+        model = new_model
+        model_loaded = True
+        model_state = "ready"
+        if path:
+            model_path = path
+
+def _extract_detections(result):
+    """Convert a YOLO result into detection dictionaries"""
+    detections = []
+    if result.boxes is not None:
+        for box in result.boxes:
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            cls = int(box.cls[0].cpu().numpy())
+            conf = float(box.conf[0].cpu().numpy())
+            
+            detections.append({
+                "class": CLASS_LABELS[cls],
+                "confidence": round(conf, 3),
+                "bbox": [int(x1), int(y1), int(x2), int(y2)]
+            })
+    
+    return detections
+
+def process_image(image, confidence_threshold=0.5):
+    """Process image and return detection results"""
+    if not model_loaded:
+        return None, "Model not loaded"
+    
+    try:
+        with inference_lock:
+            results = model(image, conf=confidence_threshold)
+        return _extract_detections(results[0]), None
+    except Exception as e:
+        return None, str(e)
+
+def process_images(images, confidence_threshold=0.5, imgsz=None, detector=None):
+    """Process a batch of images in one forward pass"""
+    if detector is None:
+        if not model_loaded:
+            return None, "Model not loaded"
+        detector = model
+    
+    options = {"conf": confidence_threshold}
+    if imgsz:
+        options["imgsz"] = imgsz
+    
+    try:
+        with inference_lock:
+            results = detector(images, **options)
+        return [_extract_detections(result) for result in results], None
+    except Exception as e:
+        return None, str(e)
+
+def annotate_frame(frame, detections):
+    """Draw bounding boxes and labels on a BGR frame in place"""
+    import cv2
+    for detection in detections:
+        x1, y1, x2, y2 = detection['bbox']
+        color = (0, 255, 0) if detection['class'] == 'Helmet' else (255, 255, 0)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        
+        label = f"{detection['class']} {detection['confidence']:.2f}"
+        cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    
+    return frame
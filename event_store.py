@@ -0,0 +1,287 @@
+"""
+Persistent detection event log for Safety Detection Dashboard
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from collections import defaultdict
+
+ROLLUPS = {
+    'minute': 60,
+    'hour': 3600
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_source_ts ON events (source, ts);
+CREATE TABLE IF NOT EXISTS rollup_minute (
+    bucket INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    class TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (bucket, source, class)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_hour (
+    bucket INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    class TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL,
+    PRIMARY KEY (bucket, source, class)
+) WITHOUT ROWID;
+"""
+
+
+class EventStore:
+    """Append-only SQLite detection log with per-minute and per-hour rollups
+
+    record() only enqueues; a writer thread drains the queue in batches,
+    inserts the raw events and folds them into the rollup tables in the same
+    transaction. Aggregate queries read whole hours from rollup_hour, the
+    partial hours at either end from rollup_minute and only the partial
+    minutes at the very edges from the raw events, so their cost depends on
+    the number of buckets rather than the number of events.
+    """
+
+    def __init__(self, db_path, batch_size=500, flush_interval=1.0, max_queue=100000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        self._writer = None
+        self._stop_event = threading.Event()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _ensure_schema(self):
+        """Create the database directory and tables on first use, not at import"""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                conn.executescript(SCHEMA)
+                conn.commit()
+            finally:
+                conn.close()
+            self._schema_ready = True
+
+    def _connect(self):
+        """Get this thread's SQLite connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self._ensure_schema()
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def record(self, source, detections, timestamp=None):
+        """Queue detections from one image or frame without blocking"""
+        if not detections:
+            return
+        ts = timestamp if timestamp is not None else time.time()
+        for detection in detections:
+            x1, y1, x2, y2 = detection['bbox']
+            try:
+                self._queue.put_nowait((ts, source, detection['class'], detection['confidence'], x1, y1, x2, y2))
+            except queue.Full:
+                self.dropped += 1
+
+    def _write_batch(self, rows):
+        """Insert raw events and fold them into the rollup tables"""
+        rollups = {name: defaultdict(lambda: [0, 0.0]) for name in ROLLUPS}
+        for ts, source, label, confidence, *_ in rows:
+            for name, seconds in ROLLUPS.items():
+                entry = rollups[name][(int(ts // seconds) * seconds, source, label)]
+                entry[0] += 1
+                entry[1] += confidence
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT INTO events (ts, source, class, confidence, x1, y1, x2, y2) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            for name, buckets in rollups.items():
+                conn.executemany(
+                    f'INSERT INTO rollup_{name} (bucket, source, class, count, confidence_sum) '
+                    'VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (bucket, source, class) DO UPDATE SET '
+                    'count = count + excluded.count, '
+                    'confidence_sum = confidence_sum + excluded.confidence_sum',
+                    [(bucket, source, label, count, conf_sum)
+                     for (bucket, source, label), (count, conf_sum) in buckets.items()])
+        self.written += len(rows)
+
+    def flush(self):
+        """Write everything currently queued"""
+        while True:
+            rows = []
+            try:
+                while len(rows) < self.batch_size:
+                    rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if rows:
+                self._write_batch(rows)
+            if len(rows) < self.batch_size:
+                return
+
+    def start_writer(self):
+        """Drain the queue in batches from a daemon thread"""
+        if self._writer is not None and self._writer.is_alive():
+            return self._writer
+
+        def run():
+            while not self._stop_event.is_set():
+                rows = []
+                try:
+                    rows.append(self._queue.get(timeout=self.flush_interval))
+                    while len(rows) < self.batch_size:
+                        rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if rows:
+                    try:
+                        self._write_batch(rows)
+                    except Exception as e:
+                        logging.error(f"Error writing detection events: {e}")
+            self.flush()
+
+        self._stop_event.clear()
+        self._writer = threading.Thread(target=run, name='event-writer', daemon=True)
+        self._writer.start()
+        return self._writer
+
+    def close(self):
+        """Stop the writer thread after flushing pending events"""
+        self._stop_event.set()
+        if self._writer is not None:
+            self._writer.join(timeout=10)
+            self._writer = None
+        else:
+            self.flush()
+
+    def _filters(self, source, label):
+        """Build the optional WHERE clause for source/class"""
+        clauses, params = [], []
+        if source:
+            clauses.append('source = ?')
+            params.append(source)
+        if label:
+            clauses.append('class = ?')
+            params.append(label)
+        return ''.join(f' AND {clause}' for clause in clauses), params
+
+    def _ranges(self, start, end):
+        """Split [start, end) into (table, start, end) covered by the coarsest source
+
+        table is 'hour' or 'minute' for a rollup, or 'events' for the partial
+        minutes at either edge, which only the raw log can answer exactly.
+        """
+        minute_start = int(-(-start // 60)) * 60
+        minute_end = int(end // 60) * 60
+        if minute_start >= minute_end:
+            return [('events', start, end)] if start < end else []
+
+        ranges = []
+        if start < minute_start:
+            ranges.append(('events', start, minute_start))
+        if minute_end < end:
+            ranges.append(('events', minute_end, end))
+
+        hour_start = -(-minute_start // 3600) * 3600
+        hour_end = minute_end // 3600 * 3600
+        if hour_start >= hour_end:
+            ranges.append(('minute', minute_start, minute_end))
+            return ranges
+
+        ranges.append(('hour', hour_start, hour_end))
+        if minute_start < hour_start:
+            ranges.append(('minute', minute_start, hour_start))
+        if hour_end < minute_end:
+            ranges.append(('minute', hour_end, minute_end))
+        return ranges
+
+    def summary(self, start, end, source=None, label=None):
+        """Get per-source, per-class totals for [start, end)"""
+        where, params = self._filters(source, label)
+        totals = defaultdict(lambda: [0, 0.0])
+        conn = self._connect()
+
+        for table, range_start, range_end in self._ranges(start, end):
+            if table == 'events':
+                query = (f'SELECT source, class, COUNT(*), SUM(confidence) FROM events '
+                         f'WHERE ts >= ? AND ts < ?{where} GROUP BY source, class')
+            else:
+                query = (f'SELECT source, class, SUM(count), SUM(confidence_sum) FROM rollup_{table} '
+                         f'WHERE bucket >= ? AND bucket < ?{where} GROUP BY source, class')
+            for row_source, row_class, count, conf_sum in conn.execute(query, [range_start, range_end] + params):
+                entry = totals[(row_source, row_class)]
+                entry[0] += count
+                entry[1] += conf_sum
+
+        return [{
+            "source": row_source,
+            "class": row_class,
+            "count": count,
+            "mean_confidence": round(conf_sum / count, 3) if count else None
+        } for (row_source, row_class), (count, conf_sum) in sorted(totals.items())]
+
+    def series(self, start, end, granularity='hour', source=None, label=None):
+        """Get counts per bucket and class from a rollup table"""
+        if granularity not in ROLLUPS:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        seconds = ROLLUPS[granularity]
+        where, params = self._filters(source, label)
+        cursor = self._connect().execute(
+            f'SELECT bucket, class, SUM(count) FROM rollup_{granularity} '
+            f'WHERE bucket >= ? AND bucket < ?{where} GROUP BY bucket, class ORDER BY bucket',
+            [int(start // seconds) * seconds, end] + params)
+
+        return [{"bucket": bucket, "class": row_class, "count": count}
+                for bucket, row_class, count in cursor]
+
+    def events(self, start, end, source=None, label=None, limit=1000):
+        """Get raw events for [start, end), newest first"""
+        where, params = self._filters(source, label)
+        cursor = self._connect().execute(
+            'SELECT ts, source, class, confidence, x1, y1, x2, y2 FROM events '
+            f'WHERE ts >= ? AND ts < ?{where} ORDER BY ts DESC LIMIT ?',
+            [start, end] + params + [limit])
+
+        return [{
+            "timestamp": ts,
+            "source": row_source,
+            "class": row_class,
+            "confidence": confidence,
+            "bbox": [x1, y1, x2, y2]
+        } for ts, row_source, row_class, confidence, x1, y1, x2, y2 in cursor]
+
+    def stats(self):
+        """Get writer counters"""
+        return {
+            "db_path": self.db_path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped
+        }
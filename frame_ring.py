@@ -0,0 +1,356 @@
+"""
+Shared-memory frame transport for Safety Detection Dashboard
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+# Slot states. The writer only touches slots it moved to WRITING and the
+# reader only touches slots it moved to READING, so pixel data is copied
+# or read without holding the lock.
+FREE, WRITING, READY, READING = range(4)
+
+STATUS_NAMES = ("stopped", "running", "reconnecting", "finished", "failed")
+STOPPED, RUNNING, RECONNECTING, FINISHED, FAILED = range(len(STATUS_NAMES))
+
+_LATEST, _STATUS, _WRITTEN, _DROPPED = range(4)
+_HEADER_FIELDS = 4
+_SEQ, _STATE, _HEIGHT, _WIDTH, _CHANNELS, _TIME_US = range(6)
+_SLOT_FIELDS = 6
+_ALIGN = 64
+
+
+class FrameRing:
+    """Fixed ring of preallocated frame slots in shared memory
+
+    A capture process decodes frames straight into a free slot and the
+    inference process reads them in place, so a frame is never pickled or
+    copied between processes. Only a handful of int64 fields per slot
+    (sequence number, owner state, shape, timestamp) change under the
+    shared lock.
+
+    In live mode the writer reuses the oldest slot the reader does not hold
+    and the reader always gets the newest frame. With lossless=True the
+    writer waits for a free slot and frames are read in order, which is
+    what file processing needs.
+    """
+
+    def __init__(self, slots=4, max_shape=(1080, 1920, 3), lossless=False, context=None):
+        import numpy as np
+
+        if slots < 2:
+            raise ValueError("A frame ring needs at least two slots")
+        context = context or multiprocessing.get_context('spawn')
+
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.lossless = lossless
+        self.slot_bytes = int(np.prod(self.max_shape))
+        header_bytes = (_HEADER_FIELDS + slots * _SLOT_FIELDS) * 8
+        self._data_offset = -(-header_bytes // _ALIGN) * _ALIGN
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self._data_offset + slots * self.slot_bytes)
+        self._cond = context.Condition()
+        self._owner = True
+        self._attach()
+        self._header[:] = 0
+        self._meta[:] = 0
+
+    def _attach(self):
+        import numpy as np
+
+        self._np = np
+        fields = _HEADER_FIELDS + self.slots * _SLOT_FIELDS
+        meta = np.ndarray((fields,), dtype=np.int64, buffer=self._shm.buf)
+        self._header = meta[:_HEADER_FIELDS]
+        self._meta = meta[_HEADER_FIELDS:].reshape(self.slots, _SLOT_FIELDS)
+
+    def __getstate__(self):
+        # Sent to the capture process, which attaches to the same segment
+        return {
+            "name": self._shm.name,
+            "slots": self.slots,
+            "max_shape": self.max_shape,
+            "lossless": self.lossless,
+            "slot_bytes": self.slot_bytes,
+            "data_offset": self._data_offset,
+            "cond": self._cond
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.max_shape = state["max_shape"]
+        self.lossless = state["lossless"]
+        self.slot_bytes = state["slot_bytes"]
+        self._data_offset = state["data_offset"]
+        self._cond = state["cond"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._attach()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def latest_seq(self):
+        return int(self._header[_LATEST])
+
+    @property
+    def frames_written(self):
+        return int(self._header[_WRITTEN])
+
+    @property
+    def status(self):
+        return int(self._header[_STATUS])
+
+    def set_status(self, status):
+        """Publish a capture status and wake anyone waiting on the ring"""
+        with self._cond:
+            self._header[_STATUS] = status
+            self._cond.notify_all()
+
+    def _view(self, index, shape):
+        return self._np.ndarray(shape, dtype=self._np.uint8, buffer=self._shm.buf,
+                                offset=self._data_offset + index * self.slot_bytes)
+
+    def _shape(self, index):
+        height, width, channels = (int(value) for value in self._meta[index, _HEIGHT:_CHANNELS + 1])
+        return (height, width, channels) if channels else (height, width)
+
+    def _find(self, states, newest):
+        """Index of the slot in one of states with the highest or lowest sequence"""
+        best = None
+        for index in range(self.slots):
+            if self._meta[index, _STATE] in states:
+                if best is None or (self._meta[index, _SEQ] > self._meta[best, _SEQ]) == newest:
+                    best = index
+        return best
+
+    def _find_readable(self, after_seq):
+        best = self._find((READY,), newest=not self.lossless)
+        return best if best is not None and self._meta[best, _SEQ] > after_seq else None
+
+    def claim(self, shape, timeout=None):
+        """Claim a slot for writing a frame of shape, returning (index, view) or None
+
+        Live rings never block: when the reader holds every slot the frame is
+        counted as dropped. Lossless rings wait up to timeout for the reader
+        to free a slot, and give up early if the status leaves RUNNING.
+        """
+        shape = tuple(shape)
+        if int(self._np.prod(shape)) > self.slot_bytes:
+            raise ValueError(f"Frame of shape {shape} does not fit a {self.max_shape} slot")
+
+        states = (FREE,) if self.lossless else (FREE, READY)
+        with self._cond:
+            if self.lossless:
+                self._cond.wait_for(lambda: self._find(states, newest=False) is not None or
+                                    self._header[_STATUS] not in (RUNNING, RECONNECTING), timeout)
+            index = self._find(states, newest=False)
+            if index is None:
+                self._header[_DROPPED] += 1
+                return None
+            slot = self._meta[index]
+            slot[_STATE] = WRITING
+            slot[_HEIGHT], slot[_WIDTH] = shape[:2]
+            slot[_CHANNELS] = shape[2] if len(shape) > 2 else 0
+        return index, self._view(index, shape)
+
+    def commit(self, index, timestamp):
+        """Publish a written slot as the newest frame and return its sequence number"""
+        with self._cond:
+            seq = int(self._header[_LATEST]) + 1
+            slot = self._meta[index]
+            slot[_SEQ] = seq
+            slot[_TIME_US] = int(timestamp * 1e6)
+            slot[_STATE] = READY
+            self._header[_LATEST] = seq
+            self._header[_WRITTEN] += 1
+            self._cond.notify_all()
+        return seq
+
+    def abort(self, index):
+        """Give back a claimed slot without publishing it"""
+        with self._cond:
+            self._meta[index, _STATE] = FREE
+            self._cond.notify_all()
+
+    def wait(self, after_seq, timeout=None):
+        """Block until a frame newer than after_seq exists or capture ends, returning the latest sequence"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._header[_LATEST] > after_seq or
+                                self._header[_STATUS] in (FINISHED, FAILED), timeout)
+            return int(self._header[_LATEST])
+
+    def acquire(self, after_seq=0, timeout=None):
+        """Take ownership of a frame newer than after_seq
+
+        Returns (index, seq, timestamp, frame) where frame is a view into the
+        slot, or None on timeout or once capture has ended. The slot is not
+        reused until release(index).
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._find_readable(after_seq) is not None or
+                                self._header[_STATUS] in (FINISHED, FAILED), timeout)
+            index = self._find_readable(after_seq)
+            if index is None:
+                return None
+            slot = self._meta[index]
+            slot[_STATE] = READING
+            seq, timestamp = int(slot[_SEQ]), int(slot[_TIME_US]) / 1e6
+            shape = self._shape(index)
+        return index, seq, timestamp, self._view(index, shape)
+
+    def release(self, index):
+        """Hand a slot taken with acquire() back to the writer"""
+        with self._cond:
+            self._meta[index, _STATE] = FREE
+            self._cond.notify_all()
+
+    def stats(self):
+        """Get transport counters and slot occupancy"""
+        with self._cond:
+            states = [int(state) for state in self._meta[:, _STATE]]
+            return {
+                "status": STATUS_NAMES[self.status],
+                "slots": self.slots,
+                "slot_mb": round(self.slot_bytes / (1024 * 1024), 2),
+                "latest_seq": self.latest_seq,
+                "frames_written": self.frames_written,
+                "frames_dropped": int(self._header[_DROPPED]),
+                "held": states.count(READING),
+                "ready": states.count(READY)
+            }
+
+    def close(self):
+        """Detach from the shared memory segment"""
+        self._header = self._meta = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with it
+            pass
+
+    def unlink(self):
+        """Free the segment (creator only)"""
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def read_frame_into(ring, cap, shape, timeout=None):
+    """Decode the next frame of a cv2.VideoCapture into a ring slot
+
+    Returns (ok, index, shape): ok is False at the end of the stream and
+    index is None when no slot was available. Once the frame shape is known
+    cv2 decodes straight into the slot; the first frame, or one whose size
+    changed, is copied in once.
+    """
+    if shape is not None:
+        claimed = ring.claim(shape, timeout)
+        if claimed is None:
+            # Live rings keep the stream drained; lossless rings read nothing yet
+            return (True if ring.lossless else cap.grab()), None, shape
+        index, view = claimed
+        ret, frame = cap.read(view)
+        if not ret:
+            ring.abort(index)
+            return False, None, shape
+        if frame.shape == view.shape and ring._np.shares_memory(frame, view):
+            return True, index, shape
+        ring.abort(index)
+    else:
+        ret, frame = cap.read()
+        if not ret:
+            return False, None, shape
+
+    claimed = ring.claim(frame.shape, timeout)
+    if claimed is None:
+        return True, None, frame.shape
+    index, view = claimed
+    view[...] = frame
+    return True, index, frame.shape
+
+
+def decode_into_ring(ring, path):
+    """Process entry point: decode every frame of a video file into a lossless ring"""
+    import time
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            ring.set_status(FAILED)
+            return
+        ring.set_status(RUNNING)
+        shape = None
+        while ring.status == RUNNING:
+            ok, index, shape = read_frame_into(ring, cap, shape)
+            if not ok:
+                break
+            if index is not None:
+                ring.commit(index, time.time())
+        if ring.status == RUNNING:
+            ring.set_status(FINISHED)
+    except Exception:
+        ring.set_status(FAILED)
+        raise
+    finally:
+        cap.release()
+        ring.close()
+
+
+def iter_capture_frames(cap):
+    """Yield the frames of an open cv2.VideoCapture in this process"""
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def iter_video_frames(path, slots=4, max_shape=(1080, 1920, 3)):
+    """Yield the frames of a video file decoded in a separate process
+
+    Each frame is a view into a ring slot that stays valid, and may be
+    modified in place, until the next frame is requested.
+    """
+    context = multiprocessing.get_context('spawn')
+    ring = FrameRing(slots, max_shape, lossless=True, context=context)
+    process = context.Process(target=decode_into_ring, args=(ring, path),
+                              name='video-decoder', daemon=True)
+    process.start()
+
+    index = None
+    seq = 0
+    try:
+        while True:
+            acquired = ring.acquire(seq, timeout=1.0)
+            if acquired is None:
+                if ring.status == FAILED:
+                    raise RuntimeError(f"Cannot decode video {path}")
+                if ring.status == FINISHED:
+                    return
+                if not process.is_alive():
+                    raise RuntimeError("Video decoder process exited")
+                continue
+            index, seq, _, frame = acquired
+            yield frame
+            frame = None
+            ring.release(index)
+            index = None
+    finally:
+        if index is not None:
+            ring.release(index)
+        ring.set_status(STOPPED)
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+        ring.close()
+        ring.unlink()
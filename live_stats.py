@@ -0,0 +1,143 @@
+"""
+Rolling live detection statistics for Safety Detection Dashboard
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class LiveStats:
+    """Incremental rolling aggregates over a ring of one-second buckets
+
+    Frames from the stream pipeline are folded into the bucket for their
+    second; when a bucket is reused its old counts are subtracted from the
+    window totals, so every update is O(classes) regardless of frame rate.
+    Snapshots are serialized once per publish and shared by all subscribers.
+    """
+
+    def __init__(self, class_labels, window_seconds=10, recent_size=10, publish_interval=1.0):
+        self.class_labels = list(class_labels)
+        self.window_seconds = window_seconds
+        self.publish_interval = publish_interval
+
+        self._bucket_second = [None] * window_seconds
+        self._bucket_frames = [0] * window_seconds
+        self._bucket_counts = [dict.fromkeys(self.class_labels, 0) for _ in range(window_seconds)]
+
+        self._window_frames = 0
+        self._window_counts = dict.fromkeys(self.class_labels, 0)
+        self._session_frames = 0
+        self._session_counts = dict.fromkeys(self.class_labels, 0)
+        self._recent = deque(maxlen=recent_size)
+
+        self._cond = threading.Condition()
+        self._version = 0
+        self._payload = json.dumps(self._snapshot(time.time()))
+        self._published_at = 0.0
+
+    def _expire(self, second):
+        """Clear the bucket slot for second if it holds an older second"""
+        slot = second % self.window_seconds
+        bucket_second = self._bucket_second[slot]
+        if bucket_second is None or second > bucket_second:
+            self._window_frames -= self._bucket_frames[slot]
+            for label, count in self._bucket_counts[slot].items():
+                self._window_counts[label] -= count
+                self._bucket_counts[slot][label] = 0
+            self._bucket_frames[slot] = 0
+            self._bucket_second[slot] = second
+        return slot
+
+    def _expire_all(self, now):
+        """Drop every bucket that has fallen out of the window"""
+        second = int(now)
+        for slot, bucket_second in enumerate(self._bucket_second):
+            if bucket_second is not None and second - bucket_second >= self.window_seconds:
+                self._window_frames -= self._bucket_frames[slot]
+                for label, count in self._bucket_counts[slot].items():
+                    self._window_counts[label] -= count
+                    self._bucket_counts[slot][label] = 0
+                self._bucket_frames[slot] = 0
+                self._bucket_second[slot] = None
+
+    def record(self, detections, source=None, timestamp=None):
+        """Fold one processed frame into the rolling aggregates"""
+        now = timestamp if timestamp is not None else time.time()
+
+        with self._cond:
+            slot = self._expire(int(now))
+            self._bucket_frames[slot] += 1
+            self._window_frames += 1
+            self._session_frames += 1
+
+            for detection in detections or []:
+                label = detection['class']
+                if label not in self._window_counts:
+                    continue
+                self._bucket_counts[slot][label] += 1
+                self._window_counts[label] += 1
+                self._session_counts[label] += 1
+                self._recent.append({
+                    "class": label,
+                    "confidence": detection['confidence'],
+                    "source": source,
+                    "timestamp": now
+                })
+
+            if now - self._published_at >= self.publish_interval:
+                self._publish(now)
+
+    def _snapshot(self, now):
+        """Build the current statistics dictionary"""
+        self._expire_all(now)
+        window_total = sum(self._window_counts.values())
+        return {
+            "timestamp": datetime.fromtimestamp(now).isoformat(),
+            "window_seconds": self.window_seconds,
+            "frames": self._window_frames,
+            "fps": round(self._window_frames / self.window_seconds, 2),
+            "total_detections": window_total,
+            "detections_per_second": round(window_total / self.window_seconds, 2),
+            "counts": dict(self._window_counts),
+            "session": {
+                "frames": self._session_frames,
+                "counts": dict(self._session_counts)
+            },
+            "recent": list(self._recent)[::-1]
+        }
+
+    def _publish(self, now):
+        """Serialize a snapshot and wake all subscribers"""
+        self._payload = json.dumps(self._snapshot(now))
+        self._published_at = now
+        self._version += 1
+        self._cond.notify_all()
+
+    def snapshot(self):
+        """Get the current statistics"""
+        with self._cond:
+            return self._snapshot(time.time())
+
+    def subscribe(self, heartbeat=15):
+        """Yield serialized snapshots as they are published
+
+        Subscribers block on a shared condition instead of polling. When no
+        frames arrive for a publish interval the window is republished so
+        the rolling numbers decay to zero, and a heartbeat keeps idle
+        connections open.
+        """
+        last_version = None
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._version != last_version,
+                                    timeout=min(heartbeat, self.window_seconds))
+                if self._version == last_version:
+                    now = time.time()
+                    if now - self._published_at >= self.publish_interval:
+                        self._publish(now)
+                last_version = self._version
+                payload = self._payload
+            yield payload
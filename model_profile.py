@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Model performance profiling for Safety Detection Dashboard
+Measures load time, warm-up time, memory and latency/throughput at several
+batch sizes and input resolutions for a model file on this machine. The
+server runs it on demand in a subprocess and caches the result per model
+file hash, so /api/models can report the figures and resolve "the most
+accurate model under X ms".
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import platform
+import threading
+import subprocess
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def machine_fingerprint():
+    """Identify the hardware a profile was measured on"""
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def rss_mb():
+    """Current resident memory of this process"""
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+
+
+def _checkpoint_accuracy(model):
+    """Validation accuracy stored in an ultralytics checkpoint, if any"""
+    ckpt = getattr(model, 'ckpt', None) or {}
+    metrics = ckpt.get('train_metrics') or {}
+    if 'metrics/mAP50-95(B)' in metrics:
+        return {
+            "map50_95": round(float(metrics['metrics/mAP50-95(B)']), 4),
+            "map50": round(float(metrics.get('metrics/mAP50(B)', 0)), 4),
+            "source": "checkpoint"
+        }
+    if ckpt.get('best_fitness') is not None:
+        # 0.1 * mAP50 + 0.9 * mAP50-95 on the training run's validation set
+        return {"fitness": round(float(ckpt['best_fitness']), 4), "source": "checkpoint_fitness"}
+    return None
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def measure_model(path, batch_sizes=(1, 4, 8), image_sizes=(640, 416, 320), iterations=10, warmup_runs=2):
+    """Profile one model in this process and return the figures
+
+    Runs through detector.process_images so post-processing is included,
+    exactly as the server pays for it.
+    """
+    import numpy as np
+    import detector
+
+    rss_start = rss_mb()
+    started = time.perf_counter()
+    model = detector.create_model(path)
+    load_ms = (time.perf_counter() - started) * 1000
+    rss_loaded = rss_mb()
+
+    started = time.perf_counter()
+    detector.warmup(model, imgsz=image_sizes[0])
+    warmup_ms = (time.perf_counter() - started) * 1000
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    latency = []
+    for imgsz in image_sizes:
+        for batch_size in batch_sizes:
+            images = [frame] * batch_size
+            for _ in range(warmup_runs):
+                detector.process_images(images, imgsz=imgsz, detector=model)
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                _, error = detector.process_images(images, imgsz=imgsz, detector=model)
+                timings.append((time.perf_counter() - started) * 1000)
+                if error:
+                    raise RuntimeError(error)
+            total_s = sum(timings) / 1000
+            latency.append({
+                "imgsz": imgsz,
+                "batch_size": batch_size,
+                "p50_ms": round(_percentile(timings, 0.5), 2),
+                "p90_ms": round(_percentile(timings, 0.9), 2),
+                "images_per_s": round(batch_size * iterations / total_s, 2)
+            })
+
+    device = str(getattr(getattr(model, 'device', None), 'type', None) or 'cpu')
+    memory = {
+        "rss_start_mb": round(rss_start, 1),
+        "model_mb": round(rss_loaded - rss_start, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+    try:
+        import torch
+        if torch.cuda.is_available():
+            memory["gpu_peak_mb"] = round(torch.cuda.max_memory_allocated() / (1024 * 1024), 1)
+    except ImportError:
+        pass
+
+    parameters = None
+    try:
+        parameters = sum(p.numel() for p in model.model.parameters())
+    except AttributeError:
+        pass
+
+    return {
+        "load_ms": round(load_ms, 1),
+        "warmup_ms": round(warmup_ms, 1),
+        "memory": memory,
+        "latency": latency,
+        "device": device,
+        "parameters": parameters,
+        "accuracy": _checkpoint_accuracy(model),
+        "iterations": iterations
+    }
+
+
+def accuracy_score(profile):
+    """Single number used to rank models by accuracy, or None if unknown"""
+    accuracy = (profile or {}).get("accuracy") or {}
+    for key in ("map50_95", "fitness"):
+        if accuracy.get(key) is not None:
+            return accuracy[key]
+    return None
+
+
+def latency_entry(profile, batch_size, imgsz):
+    """The latency figures for one batch size and resolution, or None"""
+    for entry in (profile or {}).get("latency", []):
+        if entry["batch_size"] == batch_size and entry["imgsz"] == imgsz:
+            return entry
+    return None
+
+
+class ModelProfiles:
+    """Profiles cached on disk per model file hash, measured on demand in a subprocess
+
+    A cached profile is only reused on the machine it was measured on.
+    Profiling runs one model at a time so measurements do not disturb each
+    other.
+    """
+
+    def __init__(self, cache_dir, batch_sizes=(1, 4, 8), image_sizes=(640, 416, 320),
+                 iterations=10, timeout=600):
+        self.cache_dir = cache_dir
+        self.batch_sizes = tuple(batch_sizes)
+        self.image_sizes = tuple(image_sizes)
+        self.iterations = iterations
+        self.timeout = timeout
+
+        self._digests = {}
+        self._running = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def digest(self, path):
+        """File hash of path, memoized by size and modification time"""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_hash(path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def _cache_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def get(self, path):
+        """Cached profile for path on this machine, or None"""
+        cache_path = self._cache_path(self.digest(path))
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path) as f:
+                profile = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return profile if profile.get("machine") == machine_fingerprint() else None
+
+    def status(self, path):
+        """One of profiled, profiling, failed or not_profiled"""
+        digest = self.digest(path)
+        with self._lock:
+            if digest in self._running:
+                return "profiling"
+            if digest in self._errors:
+                return "failed"
+        return "profiled" if self.get(path) is not None else "not_profiled"
+
+    def describe(self, path):
+        """Listing entry for one model file"""
+        digest = self.digest(path)
+        with self._lock:
+            error = self._errors.get(digest)
+        return {
+            "hash": digest,
+            "size_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+            "profile_status": self.status(path),
+            "profile_error": error,
+            "profile": self.get(path)
+        }
+
+    def start(self, path, force=False):
+        """Profile path in the background unless a usable profile exists; returns its status"""
+        digest = self.digest(path)
+        with self._lock:
+            if digest in self._running:
+                return "profiling"
+            if not force and self.get(path) is not None:
+                return "profiled"
+            self._errors.pop(digest, None)
+            thread = threading.Thread(target=self._run, args=(path, digest),
+                                      name=f"profile-{digest[:8]}", daemon=True)
+            self._running[digest] = thread
+        thread.start()
+        return "profiling"
+
+    def _run(self, path, digest):
+        # The profiler runs from the repo directory, so path must not stay relative
+        # to this process's working directory
+        command = [
+            sys.executable, os.path.abspath(__file__), os.path.abspath(path), '--json',
+            '--batch-sizes', ','.join(map(str, self.batch_sizes)),
+            '--image-sizes', ','.join(map(str, self.image_sizes)),
+            '--iterations', str(self.iterations)
+        ]
+        try:
+            # Serialize profiling runs; they would skew each other's timings
+            with self._run_lock:
+                result = subprocess.run(command, capture_output=True, text=True, timeout=self.timeout,
+                                        cwd=os.path.dirname(os.path.abspath(__file__)))
+            if result.returncode != 0:
+                lines = result.stderr.strip().splitlines()
+                raise RuntimeError(lines[-1] if lines else f"profiler exited with {result.returncode}")
+
+            # ultralytics logs to stdout, so the profile is the last line
+            profile = json.loads(result.stdout.strip().splitlines()[-1])
+            profile.update({
+                "hash": digest,
+                "machine": machine_fingerprint(),
+                "profiled_at": time.time()
+            })
+            cache_path = self._cache_path(digest)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path + '.tmp', 'w') as f:
+                json.dump(profile, f, indent=2)
+            os.replace(cache_path + '.tmp', cache_path)
+            print(f"✅ Profiled model {path}")
+        except Exception as e:
+            logging.error(f"Profiling {path} failed: {e}")
+            with self._lock:
+                self._errors[digest] = str(e)
+        finally:
+            with self._lock:
+                self._running.pop(digest, None)
+
+    def select(self, paths, max_latency_ms, batch_size=1, imgsz=640, percentile='p90_ms'):
+        """Pick the most accurate profiled model whose latency fits the budget
+
+        Models without a recorded accuracy rank below those with one and are
+        ordered by parameter count among themselves. Returns (path, reason)
+        with path None when nothing fits.
+        """
+        candidates = []
+        unprofiled = []
+        for path in paths:
+            profile = self.get(path)
+            entry = latency_entry(profile, batch_size, imgsz)
+            if entry is None:
+                unprofiled.append(os.path.basename(path))
+                continue
+            if entry[percentile] <= max_latency_ms:
+                score = accuracy_score(profile)
+                candidates.append(((score is not None, score or 0, profile.get("parameters") or 0), path, entry))
+
+        if not candidates:
+            reason = f"No profiled model runs batch {batch_size} at {imgsz}px within {max_latency_ms} ms"
+            if unprofiled:
+                reason += f" (not profiled for this setting: {', '.join(unprofiled)})"
+            return None, reason
+
+        _, path, entry = max(candidates, key=lambda candidate: candidate[0])
+        return path, f"{entry[percentile]} ms {percentile[:3]} at batch {batch_size}, {imgsz}px"
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Profile a detection model on this machine")
+    parser.add_argument('model', help="Path to a .pt model file")
+    parser.add_argument('--batch-sizes', type=_int_list, default=[1, 4, 8])
+    parser.add_argument('--image-sizes', type=_int_list, default=[640, 416, 320])
+    parser.add_argument('--iterations', type=int, default=10, help="Timed runs per batch size and resolution")
+    parser.add_argument('--json', action='store_true', help="Print the profile as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"❌ Model not found: {args.model}", file=sys.stderr)
+        sys.exit(2)
+
+    profile = measure_model(args.model, args.batch_sizes, args.image_sizes, args.iterations)
+    if args.json:
+        print(json.dumps(profile))
+        return
+
+    print("=" * 60)
+    print(f"📐 Model Profile: {args.model}")
+    print("=" * 60)
+    print(f"Device: {profile['device']}, parameters: {profile['parameters']}")
+    print(f"Load: {profile['load_ms']} ms, warm-up: {profile['warmup_ms']} ms")
+    print(f"Memory: +{profile['memory']['model_mb']} MB for the model, "
+          f"peak RSS {profile['memory']['peak_rss_mb']} MB")
+    print(f"Accuracy: {profile['accuracy'] or 'not recorded in checkpoint'}")
+    print(f"{'imgsz':>6} {'batch':>6} {'p50 ms':>9} {'p90 ms':>9} {'images/s':>10}")
+    for entry in profile["latency"]:
+        print(f"{entry['imgsz']:>6} {entry['batch_size']:>6} {entry['p50_ms']:>9} "
+              f"{entry['p90_ms']:>9} {entry['images_per_s']:>10}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
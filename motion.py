@@ -0,0 +1,169 @@
+"""
+Motion-gated inference for Safety Detection Dashboard
+"""
+
+from numbers import Real
+
+
+def validate_rois(rois):
+    """Return rois as a list of (x1, y1, x2, y2) tuples or raise ValueError
+
+    Each ROI must be four numbers in normalized frame coordinates with
+    0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1; anything else would crash the
+    gate or produce an empty crop at inference time.
+    """
+    if rois is None:
+        return []
+    if not isinstance(rois, (list, tuple)):
+        raise ValueError("rois must be a list of [x1, y1, x2, y2] rectangles")
+
+    validated = []
+    for roi in rois:
+        if (not isinstance(roi, (list, tuple)) or len(roi) != 4
+                or not all(isinstance(v, Real) and not isinstance(v, bool) for v in roi)):
+            raise ValueError(f"Invalid ROI {roi!r}: expected four numbers [x1, y1, x2, y2]")
+        x1, y1, x2, y2 = (float(v) for v in roi)
+        if not (0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1):
+            raise ValueError(f"Invalid ROI {roi!r}: need 0 <= x1 < x2 <= 1 and 0 <= y1 < y2 <= 1")
+        validated.append((x1, y1, x2, y2))
+    return validated
+
+
+class MotionGate:
+    """Decides per frame whether YOLO needs to run, and on which region
+
+    A downscaled, blurred grayscale copy of each frame is compared with a
+    running-average background. Frames without meaningful change reuse the
+    last detections; with regions of interest configured, only the moving
+    ROIs are cropped and re-detected while detections elsewhere are kept.
+    A full-frame inference is forced every max_skip frames so objects that
+    appear without tripping the threshold are never missed for long.
+    """
+
+    def __init__(self, width=160, pixel_threshold=25, min_area=0.005, learning_rate=0.05,
+                 max_skip=30, rois=None, full_frame_ratio=0.6):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.learning_rate = learning_rate
+        self.max_skip = max_skip
+        self.rois = validate_rois(rois)
+        self.full_frame_ratio = full_frame_ratio
+
+        self.last_detections = []
+        self._background = None
+        self._since_full = 0
+
+        self.frames = 0
+        self.skipped = 0
+        self.cropped = 0
+        self.forced = 0
+
+    def _motion_mask(self, frame):
+        """Update the background model and return the changed-pixel mask"""
+        import cv2
+        import numpy as np
+
+        height, width = frame.shape[:2]
+        small_height = max(int(height * self.width / width), 1)
+        small = cv2.resize(frame, (self.width, small_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray.astype(np.float32)
+            return None
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        return diff > self.pixel_threshold
+
+    @staticmethod
+    def _roi_slice(roi, shape):
+        """Convert a normalized (x1, y1, x2, y2) ROI to array slices"""
+        height, width = shape[:2]
+        x1, y1, x2, y2 = roi
+        return (slice(int(y1 * height), max(int(y2 * height), int(y1 * height) + 1)),
+                slice(int(x1 * width), max(int(x2 * width), int(x1 * width) + 1)))
+
+    def plan(self, frame):
+        """Return the (x1, y1, x2, y2) pixel region to infer, or None to skip"""
+        self.frames += 1
+        height, width = frame.shape[:2]
+        full = (0, 0, width, height)
+        mask = self._motion_mask(frame)
+
+        if mask is None or self._since_full >= self.max_skip:
+            if mask is not None:
+                self.forced += 1
+            self._since_full = 0
+            return full
+
+        if not self.rois:
+            if mask.mean() >= self.min_area:
+                self._since_full = 0
+                return full
+            self._since_full += 1
+            self.skipped += 1
+            return None
+
+        moving = [roi for roi in self.rois if mask[self._roi_slice(roi, mask.shape)].mean() >= self.min_area]
+        if not moving:
+            self._since_full += 1
+            self.skipped += 1
+            return None
+
+        x1 = min(roi[0] for roi in moving)
+        y1 = min(roi[1] for roi in moving)
+        x2 = max(roi[2] for roi in moving)
+        y2 = max(roi[3] for roi in moving)
+        if (x2 - x1) * (y2 - y1) >= self.full_frame_ratio:
+            self._since_full = 0
+            return full
+
+        self._since_full += 1
+        self.cropped += 1
+        left, top = int(x1 * width), int(y1 * height)
+        return (left, top, max(int(x2 * width), left + 1), max(int(y2 * height), top + 1))
+
+    def merge(self, detections, region, frame_shape):
+        """Map detections from region back to the frame and remember them
+
+        Previous detections whose centre lies outside a cropped region are
+        carried over, since that part of the frame was not re-examined.
+        """
+        height, width = frame_shape[:2]
+        x_off, y_off, x_end, y_end = region
+        if (x_off, y_off, x_end, y_end) == (0, 0, width, height):
+            self.last_detections = detections
+            return detections
+
+        merged = []
+        for detection in self.last_detections:
+            bx1, by1, bx2, by2 = detection['bbox']
+            cx, cy = (bx1 + bx2) / 2, (by1 + by2) / 2
+            if not (x_off <= cx < x_end and y_off <= cy < y_end):
+                merged.append(detection)
+
+        for detection in detections:
+            bx1, by1, bx2, by2 = detection['bbox']
+            merged.append(dict(detection, bbox=[bx1 + x_off, by1 + y_off, bx2 + x_off, by2 + y_off]))
+
+        self.last_detections = merged
+        return merged
+
+    @staticmethod
+    def crop(frame, region):
+        """Crop a frame to a pixel region without copying"""
+        x1, y1, x2, y2 = region
+        return frame[y1:y2, x1:x2]
+
+    def stats(self):
+        """Get skip and crop statistics"""
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "cropped": self.cropped,
+            "forced": self.forced,
+            "inferred": self.frames - self.skipped,
+            "skip_rate": round(self.skipped / self.frames, 3) if self.frames else 0.0
+        }
@@ -0,0 +1,159 @@
+"""
+Adaptive quality controller for the live detection pipeline
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime
+
+
+def build_quality_ladder(jpeg_qualities, image_sizes, max_stride, models):
+    """Build quality levels ordered from best quality to cheapest
+
+    Each step degrades exactly one knob, cheapest accuracy loss first:
+    JPEG quality (display only), then detection stride, then inference
+    resolution, then the model itself.
+    """
+    models = list(models) or [None]
+    level = {
+        "jpeg_quality": jpeg_qualities[0],
+        "stride": 1,
+        "imgsz": image_sizes[0],
+        "model": models[0]
+    }
+    ladder = [dict(level)]
+
+    for quality in jpeg_qualities[1:]:
+        level["jpeg_quality"] = quality
+        ladder.append(dict(level))
+    for stride in range(2, max_stride + 1):
+        level["stride"] = stride
+        ladder.append(dict(level))
+    for imgsz in image_sizes[1:]:
+        level["imgsz"] = imgsz
+        ladder.append(dict(level))
+    for model in models[1:]:
+        level["model"] = model
+        ladder.append(dict(level))
+
+    return ladder
+
+
+def _cpu_percent():
+    """Get system-wide CPU usage, or None when psutil is unavailable"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.cpu_percent(interval=None)
+
+
+class QualityController:
+    """Feedback controller holding end-to-end frame latency near a target
+
+    Latencies are observed per frame; every adjust_interval the 90th
+    percentile of the window is compared with the target. Above the band (or
+    with CPU saturated) the controller steps one level down the ladder;
+    below the band with CPU headroom, and only after a cooldown, it steps
+    back up. The asymmetric cooldown keeps it from oscillating between
+    adjacent levels.
+    """
+
+    def __init__(self, ladder, target_latency, tolerance=0.2, adjust_interval=2.0,
+                 upgrade_cooldown=10.0, cpu_high=90.0, cpu_low=60.0, window=120,
+                 cpu_sampler=_cpu_percent, enabled=True):
+        self.ladder = ladder
+        self.target_latency = target_latency
+        self.tolerance = tolerance
+        self.adjust_interval = adjust_interval
+        self.upgrade_cooldown = upgrade_cooldown
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.cpu_sampler = cpu_sampler
+        self.enabled = enabled
+
+        self.level_index = 0
+        self.history = deque(maxlen=100)
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._last_adjust = None
+        self._last_change = 0.0
+        self._last_cpu = None
+
+    @property
+    def level(self):
+        """Get the knob settings for the current level"""
+        return self.ladder[self.level_index]
+
+    def observe(self, latency, now=None):
+        """Record one end-to-end frame latency in seconds and maybe adjust"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._latencies.append(latency)
+            if self._last_adjust is None:
+                self._last_adjust = now
+            if self.enabled and now - self._last_adjust >= self.adjust_interval:
+                self._last_adjust = now
+                self._adjust(now)
+
+    def _percentile(self, fraction):
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def _adjust(self, now):
+        p90 = self._percentile(0.9)
+        cpu = self.cpu_sampler() if self.cpu_sampler else None
+        self._last_cpu = cpu
+        if p90 is None:
+            return
+
+        upper = self.target_latency * (1 + self.tolerance)
+        lower = self.target_latency * (1 - self.tolerance)
+        cpu_saturated = cpu is not None and cpu >= self.cpu_high
+        cpu_headroom = cpu is None or cpu <= self.cpu_low
+
+        if (p90 > upper or cpu_saturated) and self.level_index < len(self.ladder) - 1:
+            reason = "latency above target" if p90 > upper else "cpu saturated"
+            self._change(self.level_index + 1, reason, p90, cpu, now)
+        elif p90 < lower and cpu_headroom and self.level_index > 0 \
+                and now - self._last_change >= self.upgrade_cooldown:
+            self._change(self.level_index - 1, "headroom available", p90, cpu, now)
+
+    def _change(self, new_index, reason, p90, cpu, now):
+        previous = self.ladder[self.level_index]
+        self.level_index = new_index
+        self._last_change = now
+        # Latencies measured at the old level no longer describe the pipeline
+        self._latencies.clear()
+
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "reason": reason,
+            "p90_latency_ms": round(p90 * 1000, 1),
+            "cpu_percent": cpu,
+            "level": new_index,
+            "from": previous,
+            "to": self.ladder[new_index]
+        }
+        self.history.append(entry)
+        print(f"⚙️  Quality level {new_index}/{len(self.ladder) - 1} ({reason}): {previous} -> {self.ladder[new_index]}")
+
+    def status(self):
+        """Get the current level, recent latency and adjustment history"""
+        with self._lock:
+            p50 = self._percentile(0.5)
+            p90 = self._percentile(0.9)
+            return {
+                "enabled": self.enabled,
+                "target_latency_ms": round(self.target_latency * 1000, 1),
+                "level": self.level_index,
+                "levels": len(self.ladder),
+                "settings": dict(self.level),
+                "p50_latency_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p90_latency_ms": round(p90 * 1000, 1) if p90 is not None else None,
+                "cpu_percent": self._last_cpu,
+                "history": list(self.history)
+            }
@@ -6,7 +6,7 @@ This script runs the Flask application with proper configuration
 
 import os
 import sys
-from app import app
+from app import app, start_background_services
 from config import config
 
 def main():
@@ -23,6 +23,7 @@ def main():
     # Initialize app with configuration
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
+    start_background_services(debug=app.config.get('DEBUG', False))
     
     # Get host and port from configuration
     host = app.config.get('API_HOST', '0.0.0.0')
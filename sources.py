@@ -0,0 +1,630 @@
+"""
+Multi-source video ingestion and inference scheduling for Safety Detection Dashboard
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import threading
+import multiprocessing
+from collections import deque
+
+from motion import MotionGate, validate_rois
+from frame_ring import FrameRing, read_frame_into, STATUS_NAMES, RECONNECTING, FINISHED, FAILED
+
+RESERVED_SOURCE_IDS = {'stats'}
+
+
+def parse_source_uri(uri):
+    """Convert a source URI to what cv2.VideoCapture expects
+
+    Digit strings are device indices; anything else (RTSP/HTTP URLs, local
+    files) is passed through unchanged.
+    """
+    if isinstance(uri, int):
+        return uri
+    uri = str(uri).strip()
+    return int(uri) if uri.isdigit() else uri
+
+
+def load_source_definitions(sources_file, default_uri, default_fps):
+    """Load source definitions from a JSON file, falling back to one camera"""
+    if sources_file and os.path.exists(sources_file):
+        with open(sources_file) as f:
+            definitions = json.load(f)
+        return definitions.get('sources', definitions) if isinstance(definitions, dict) else definitions
+
+    return [{"id": "camera", "uri": default_uri, "fps": default_fps, "priority": 1}]
+
+
+class VideoSource:
+    """One capture thread that keeps only the newest frame of a source"""
+
+    transport = "thread"
+
+    def __init__(self, source_id, uri, fps=5, priority=1, loop=True, reconnect_delay=2.0, gate=None):
+        self.source_id = source_id
+        self.uri = parse_source_uri(uri)
+        self.fps = float(fps)
+        self.priority = max(float(priority), 0.1)
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.is_file = isinstance(self.uri, str) and os.path.isfile(self.uri)
+        self.gate = gate
+
+        self.frame = None
+        self.frame_seq = 0
+        self.frame_time = 0.0
+        self.inferred_seq = 0
+        self.next_due = time.monotonic()
+
+        self.status = "stopped"
+        self.error = None
+        self.frames_captured = 0
+        self.frames_inferred = 0
+        self.last_lag = None
+        self.avg_lag = None
+        self._capture_times = deque(maxlen=120)
+        self._inference_times = deque(maxlen=120)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps if self.fps > 0 else 0.0
+
+    def start(self, on_frame):
+        """Start the capture thread; on_frame() is called after every new frame"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(on_frame,),
+                                        name=f"capture-{self.source_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.status = "stopped"
+
+    def _run(self, on_frame):
+        import cv2
+
+        while not self._stop_event.is_set():
+            cap = cv2.VideoCapture(self.uri)
+            if not cap.isOpened():
+                self.status = "reconnecting"
+                self.error = f"Cannot open source {self.uri}"
+                cap.release()
+                self._stop_event.wait(self.reconnect_delay)
+                continue
+
+            self.status = "running"
+            self.error = None
+            # Local files are paced at their native frame rate so they behave
+            # like live cameras instead of being decoded as fast as possible.
+            file_fps = cap.get(cv2.CAP_PROP_FPS) if self.is_file else 0
+            file_interval = 1.0 / file_fps if file_fps and file_fps > 0 else 0.0
+            next_read = time.monotonic()
+
+            while not self._stop_event.is_set():
+                ok = self._read(cap)
+                if not ok:
+                    break
+                on_frame()
+
+                if file_interval:
+                    next_read += file_interval
+                    delay = next_read - time.monotonic()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+                    else:
+                        next_read = time.monotonic()
+
+            cap.release()
+            if self._stop_event.is_set():
+                break
+            if self.is_file and not self.loop:
+                self.status = "finished"
+                break
+            if not self.is_file:
+                self.status = "reconnecting"
+                self.error = "Stream ended"
+                self._stop_event.wait(self.reconnect_delay)
+
+    def _read(self, cap):
+        """Read the next frame from cap and make it the newest one"""
+        ret, frame = cap.read()
+        if not ret:
+            return False
+        now = time.time()
+        self.frame = frame
+        self.frame_time = now
+        self.frame_seq += 1
+        self.frames_captured += 1
+        self._capture_times.append(now)
+        return True
+
+    def has_frame(self):
+        """Check whether a frame newer than the last inference exists"""
+        return self.frame is not None and self.frame_seq != self.inferred_seq
+
+    def take_frame(self):
+        """Return (seq, frame, capture_time) if a frame newer than the last inference exists"""
+        seq = self.frame_seq
+        if seq == self.inferred_seq or self.frame is None:
+            return None
+        return seq, self.frame, self.frame_time
+
+    def mark_inferred(self, seq, frame_time, now, stride=1):
+        """Record a completed inference and schedule the next one
+
+        A stride above one stretches the FPS budget so only every Nth due
+        slot is inferred.
+        """
+        self.inferred_seq = seq
+        self.frames_inferred += 1
+        self._inference_times.append(now)
+
+        lag = now - frame_time
+        self.last_lag = lag
+        self.avg_lag = lag if self.avg_lag is None else 0.9 * self.avg_lag + 0.1 * lag
+
+        # Never bank more than one interval of debt, so a source that fell
+        # behind does not burst afterwards and starve the others.
+        interval = self.interval * stride
+        monotonic_now = time.monotonic()
+        self.next_due = max(self.next_due + interval, monotonic_now - interval)
+
+    @staticmethod
+    def _rate(timestamps, window=10.0):
+        now = time.time()
+        recent = [t for t in timestamps if now - t <= window]
+        if len(recent) < 2:
+            return 0.0
+        span = max(now - recent[0], 1e-6)
+        return round(len(recent) / span, 2)
+
+    def metrics(self):
+        """Get capture and inference metrics for this source"""
+        return {
+            "id": self.source_id,
+            "uri": str(self.uri),
+            "status": self.status,
+            "error": self.error,
+            "priority": self.priority,
+            "target_fps": self.fps,
+            "capture_fps": self._rate(self._capture_times),
+            "achieved_fps": self._rate(self._inference_times),
+            "lag_ms": round(self.last_lag * 1000, 1) if self.last_lag is not None else None,
+            "avg_lag_ms": round(self.avg_lag * 1000, 1) if self.avg_lag is not None else None,
+            "frames_captured": self.frames_captured,
+            "frames_inferred": self.frames_inferred,
+            "frames_skipped": max(self.frames_captured - self.frames_inferred, 0),
+            "motion": self.gate.stats() if self.gate is not None else None,
+            "transport": self.transport
+        }
+
+
+class _RingCapture(VideoSource):
+    """The capture loop as run inside a capture process, writing into a FrameRing"""
+
+    def __init__(self, ring, *args, **kwargs):
+        self.ring = ring
+        self._shape = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def status(self):
+        return STATUS_NAMES[self.ring.status]
+
+    @status.setter
+    def status(self, value):
+        self.ring.set_status(STATUS_NAMES.index(value))
+
+    def _read(self, cap):
+        ok, index, self._shape = read_frame_into(self.ring, cap, self._shape)
+        if ok and index is not None:
+            self.ring.commit(index, time.time())
+        return ok
+
+
+def _run_ring_capture(ring, source_id, uri, loop, reconnect_delay, stop_event):
+    """Capture process entry point"""
+    capture = _RingCapture(ring, source_id, uri, loop=loop, reconnect_delay=reconnect_delay)
+    capture._stop_event = stop_event
+    try:
+        capture._run(lambda: None)
+    except Exception:
+        ring.set_status(FAILED)
+        raise
+    finally:
+        ring.close()
+
+
+class SharedMemoryVideoSource(VideoSource):
+    """A source whose capture and decoding run in a separate process
+
+    Decoded frames arrive through a FrameRing and inference reads them in
+    place from shared memory, so decoding no longer competes with the web
+    threads for the GIL and no frame is pickled. The slots behind the last
+    `retain` published results stay held so viewers can still encode them.
+    """
+
+    transport = "shared_memory"
+
+    def __init__(self, *args, slots=4, max_shape=(1080, 1920, 3), retain=2, **kwargs):
+        super().__init__(*args, **kwargs)
+        if slots < retain + 2:
+            raise ValueError(f"A shared memory source needs at least {retain + 2} slots")
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.retain = retain
+        self.ring = None
+        self._process = None
+        self._process_stop = None
+        self._taken = {}
+        self._held = deque()
+
+    def start(self, on_frame):
+        """Start the capture process and the thread that relays its progress"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        context = multiprocessing.get_context('spawn')
+        self.ring = FrameRing(self.slots, self.max_shape, context=context)
+        self.frame_seq = self.inferred_seq = 0
+        self._process_stop = context.Event()
+        self._process = context.Process(
+            target=_run_ring_capture,
+            args=(self.ring, self.source_id, self.uri, self.loop, self.reconnect_delay, self._process_stop),
+            name=f"capture-{self.source_id}",
+            daemon=True
+        )
+        self._process.start()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, args=(on_frame,),
+                                        name=f"ring-{self.source_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture process and free the ring"""
+        self._stop_event.set()
+        if self._process_stop is not None:
+            self._process_stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+        ring, self.ring = self.ring, None
+        if ring is not None:
+            ring.close()
+            ring.unlink()
+        self._taken.clear()
+        self._held.clear()
+        self.status = "stopped"
+
+    def _watch(self, on_frame):
+        """Mirror the capture process's status and wake the scheduler on new frames"""
+        ring = self.ring
+        seen = 0
+        while not self._stop_event.is_set():
+            latest = ring.wait(seen, timeout=0.5)
+            status = ring.status
+            if status != FINISHED and not self._process.is_alive():
+                self.status = "failed"
+                self.error = "Capture process exited"
+            else:
+                self.status = STATUS_NAMES[status]
+                self.error = f"Cannot read source {self.uri}" if status == RECONNECTING else None
+
+            if latest > seen:
+                seen = latest
+                now = time.time()
+                self.frame_seq = latest
+                self.frame_time = now
+                self.frames_captured = ring.frames_written
+                self._capture_times.append(now)
+                on_frame()
+            elif status in (FINISHED, FAILED) or self.status == "failed":
+                self._stop_event.wait(0.5)
+
+    def has_frame(self):
+        ring = self.ring
+        return ring is not None and ring.latest_seq > self.inferred_seq
+
+    def take_frame(self):
+        """Take ownership of the newest frame; it is read in place from shared memory"""
+        ring = self.ring
+        acquired = ring.acquire(self.inferred_seq, timeout=0) if ring is not None else None
+        if acquired is None:
+            return None
+        index, seq, frame_time, frame = acquired
+        self._taken[seq] = index
+        return seq, frame, frame_time
+
+    def mark_inferred(self, seq, frame_time, now, stride=1):
+        super().mark_inferred(seq, frame_time, now, stride)
+        ring = self.ring
+        index = self._taken.pop(seq, None)
+        if ring is None:
+            return
+        if index is not None:
+            self._held.append(index)
+        while len(self._held) > self.retain:
+            ring.release(self._held.popleft())
+
+    def metrics(self):
+        metrics = super().metrics()
+        ring = self.ring
+        metrics["ring"] = ring.stats() if ring is not None else None
+        return metrics
+
+
+SOURCE_TRANSPORTS = {
+    VideoSource.transport: VideoSource,
+    SharedMemoryVideoSource.transport: SharedMemoryVideoSource
+}
+
+
+class SourceManager:
+    """Schedules inference across many sources with one batched forward pass
+
+    Capture runs in one thread per source inside this process, or in a
+    capture process per source with the shared_memory transport; a single
+    scheduler thread picks the sources whose FPS budget is due, ordered by
+    lateness weighted by priority, and runs them through infer_batch
+    together. Under overload every source slows down in proportion to its
+    priority instead of the first source starving the rest.
+    """
+
+    def __init__(self, infer_batch, on_result=None, max_batch_size=8, gate_factory=None,
+                 transport='thread', ring_options=None):
+        if transport not in SOURCE_TRANSPORTS:
+            raise ValueError(f"Unknown capture transport: {transport}")
+        self.infer_batch = infer_batch
+        self.gate_factory = gate_factory
+        self.transport = transport
+        self.ring_options = ring_options or {}
+        self.on_result = on_result
+        self.max_batch_size = max_batch_size
+        self.stride = 1
+
+        self.sources = {}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._result_cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._scheduler = None
+
+        self.batches = 0
+        self.batched_frames = 0
+        self.avg_inference_ms = None
+        self.scheduler_errors = 0
+        self.last_scheduler_error = None
+
+    def add_source(self, source_id, uri, fps=5, priority=1, loop=True, rois=None, transport=None):
+        """Register and start capturing a source
+
+        rois is an optional list of normalized (x1, y1, x2, y2) rectangles
+        that restrict motion gating to parts of the frame. transport
+        overrides the manager's default capture transport.
+        """
+        if not source_id or source_id in RESERVED_SOURCE_IDS or '/' in source_id:
+            raise ValueError(f"Invalid source id: {source_id}")
+        transport = transport or self.transport
+        if transport not in SOURCE_TRANSPORTS:
+            raise ValueError(f"Unknown capture transport: {transport}")
+        # A zero FPS budget would infer the source at full capture rate
+        fps, priority = float(fps), float(priority)
+        if not (math.isfinite(fps) and fps > 0):
+            raise ValueError(f"fps must be a positive number, got {fps}")
+        if not (math.isfinite(priority) and priority > 0):
+            raise ValueError(f"priority must be a positive number, got {priority}")
+        rois = validate_rois(rois)
+        options = self.ring_options if transport == SharedMemoryVideoSource.transport else {}
+
+        with self._lock:
+            if source_id in self.sources:
+                raise ValueError(f"Source already exists: {source_id}")
+            gate = self.gate_factory(rois) if self.gate_factory is not None else None
+            source = SOURCE_TRANSPORTS[transport](source_id, uri, fps=fps, priority=priority,
+                                                  loop=loop, gate=gate, **options)
+            self.sources[source_id] = source
+
+        if self._scheduler is not None:
+            source.start(self._notify)
+        return source
+
+    def remove_source(self, source_id):
+        """Stop and unregister a source"""
+        with self._lock:
+            source = self.sources.pop(source_id, None)
+        if source is None:
+            return False
+        source.stop()
+        with self._result_cond:
+            self._results.pop(source_id, None)
+            self._result_cond.notify_all()
+        return True
+
+    def _notify(self):
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def start(self):
+        """Start all capture threads and the scheduler"""
+        if self._scheduler is not None and self._scheduler.is_alive():
+            return
+        self._stop_event.clear()
+        for source in list(self.sources.values()):
+            source.start(self._notify)
+        self._scheduler = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+        self._scheduler.start()
+
+    def stop(self):
+        """Stop the scheduler and every capture thread"""
+        self._stop_event.set()
+        self._notify()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=5)
+            self._scheduler = None
+        for source in list(self.sources.values()):
+            source.stop()
+
+    def _select(self):
+        """Pick the due sources for the next batch, most late first"""
+        now = time.monotonic()
+        due = []
+        next_wakeup = None
+
+        with self._lock:
+            sources = list(self.sources.values())
+
+        for source in sources:
+            if not source.has_frame():
+                continue
+            if source.next_due <= now:
+                lateness = now - source.next_due + source.interval
+                due.append((lateness * source.priority, source))
+            elif next_wakeup is None or source.next_due < next_wakeup:
+                next_wakeup = source.next_due
+
+        due.sort(key=lambda item: item[0], reverse=True)
+        return [source for _, source in due[:self.max_batch_size]], next_wakeup
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            # One bad frame or source must not take down scheduling for all of them
+            try:
+                self._step()
+            except Exception as e:
+                self.scheduler_errors += 1
+                self.last_scheduler_error = str(e)
+                logging.exception(f"Inference scheduler iteration failed: {e}")
+                self._stop_event.wait(0.5)
+
+    def _step(self):
+        """Run one scheduling round: select due sources, gate, infer and publish"""
+        selected, next_wakeup = self._select()
+        if not selected:
+            timeout = 0.5 if next_wakeup is None else max(next_wakeup - time.monotonic(), 0.001)
+            with self._wakeup:
+                self._wakeup.wait(min(timeout, 0.5))
+            return
+
+        batch = []
+        for source in selected:
+            taken = source.take_frame()
+            if taken is None:
+                continue
+            seq, frame, frame_time = taken
+            if source.gate is None:
+                batch.append((source, taken, None))
+                continue
+
+            # Unchanged frames reuse the last detections without a forward pass
+            region = source.gate.plan(frame)
+            if region is None:
+                source.mark_inferred(seq, frame_time, time.time(), self.stride)
+                self._publish(source, seq, frame, frame_time, source.gate.last_detections, inferred=False)
+            else:
+                batch.append((source, taken, region))
+        if not batch:
+            return
+
+        images = [frame if region is None else MotionGate.crop(frame, region)
+                  for _, (_, frame, _), region in batch]
+        started = time.perf_counter()
+        try:
+            results, error = self.infer_batch(images)
+        except Exception as e:
+            results, error = None, str(e)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if error:
+            logging.error(f"Batched inference failed: {error}")
+            results = [None] * len(batch)
+            self._stop_event.wait(0.5)
+
+        self.batches += 1
+        self.batched_frames += len(batch)
+        self.avg_inference_ms = elapsed_ms if self.avg_inference_ms is None \
+            else 0.9 * self.avg_inference_ms + 0.1 * elapsed_ms
+
+        now = time.time()
+        for (source, (seq, frame, frame_time), region), detections in zip(batch, results):
+            source.mark_inferred(seq, frame_time, now, self.stride)
+            if detections is None:
+                continue
+            if source.gate is not None:
+                detections = source.gate.merge(detections, region, frame.shape)
+            self._publish(source, seq, frame, frame_time, detections)
+
+    def _publish(self, source, seq, frame, frame_time, detections, inferred=True):
+        """Store a source result for viewers and hand it to on_result
+
+        inferred is False when the motion gate reused earlier detections, so
+        consumers measuring inference latency can ignore the result.
+        """
+        with self._result_cond:
+            self._results[source.source_id] = (seq, frame, detections, frame_time)
+            self._result_cond.notify_all()
+        if self.on_result is not None:
+            try:
+                self.on_result(source.source_id, frame, detections, frame_time, inferred)
+            except Exception as e:
+                logging.error(f"Error handling result for {source.source_id}: {e}")
+
+    def latest(self, source_id):
+        """Get the newest (seq, frame, detections, frame_time) for a source"""
+        with self._result_cond:
+            return self._results.get(source_id)
+
+    def results(self, source_id, timeout=5.0):
+        """Yield results for a source as they are produced"""
+        last_seq = None
+        while source_id in self.sources:
+            with self._result_cond:
+                self._result_cond.wait_for(
+                    lambda: source_id not in self.sources or
+                    (source_id in self._results and self._results[source_id][0] != last_seq),
+                    timeout=timeout)
+                result = self._results.get(source_id)
+            if result is None or result[0] == last_seq:
+                continue
+            last_seq = result[0]
+            yield result
+
+    def default_source_id(self):
+        """Get the first registered source id"""
+        with self._lock:
+            return next(iter(self.sources), None)
+
+    def metrics(self):
+        """Get scheduler and per-source metrics"""
+        with self._lock:
+            sources = list(self.sources.values())
+        return {
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_frames / self.batches, 2) if self.batches else 0,
+            "avg_inference_ms": round(self.avg_inference_ms, 1) if self.avg_inference_ms is not None else None,
+            "max_batch_size": self.max_batch_size,
+            "stride": self.stride,
+            "scheduler_alive": self._scheduler is not None and self._scheduler.is_alive(),
+            "scheduler_errors": self.scheduler_errors,
+            "last_scheduler_error": self.last_scheduler_error,
+            "sources": [source.metrics() for source in sources]
+        }
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Startup time profiling for Safety Detection Dashboard
+Records named startup phases in-process (exposed via /api/health/startup)
+and, when run as a script, measures import time and time-to-health of a
+fresh server so startup regressions can be caught.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import urllib.request
+from contextlib import contextmanager
+
+PROFILE_START = time.perf_counter()
+_phases = []
+_lock = threading.Lock()
+
+
+def record(name, seconds, started=None):
+    """Record a completed startup phase"""
+    started = started if started is not None else time.perf_counter() - seconds
+    with _lock:
+        _phases.append({
+            "phase": name,
+            "start_ms": round((started - PROFILE_START) * 1000, 1),
+            "duration_ms": round(seconds * 1000, 1)
+        })
+
+
+@contextmanager
+def phase(name, once=False):
+    """Time a block as a named startup phase
+
+    With once=True only the first occurrence is recorded, which is what
+    lazy imports need: later calls hit sys.modules and cost nothing.
+    """
+    if once and any(entry["phase"] == name for entry in _phases):
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started, started)
+
+
+def breakdown():
+    """Get all recorded phases, ordered by start time"""
+    with _lock:
+        phases = sorted(_phases, key=lambda entry: entry["start_ms"])
+    return {
+        "uptime_ms": round((time.perf_counter() - PROFILE_START) * 1000, 1),
+        "phases": phases
+    }
+
+
+def parse_importtime(output, top=15):
+    """Parse `python -X importtime` output into the slowest top-level imports"""
+    imports = []
+    pattern = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+    for line in output.splitlines():
+        match = pattern.match(line)
+        if match and len(match.group(3)) <= 1:
+            imports.append({
+                "module": match.group(4),
+                "cumulative_ms": round(int(match.group(2)) / 1000, 1)
+            })
+    imports.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    return imports[:top]
+
+
+def measure_import(module='app', top=15):
+    """Import module in a fresh interpreter and return wall time and slowest imports"""
+    code = (f"import time; started = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - started)")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "import failed")
+    return {
+        "module": module,
+        "import_ms": round(float(result.stdout.strip().splitlines()[-1]) * 1000, 1),
+        "slowest": parse_importtime(result.stderr, top)
+    }
+
+
+def _wait_for(url, deadline, accept=(200,)):
+    """Poll url until it answers with an accepted status, returning seconds waited or None"""
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status in accept:
+                    return time.perf_counter() - started
+        except Exception:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def measure_server(port, timeout=120):
+    """Start run_dashboard.py and measure time to liveness and readiness"""
+    env = dict(os.environ, API_PORT=str(port), FLASK_DEBUG='False', FLASK_CONFIG='production')
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_dashboard.py')
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        base = f"http://127.0.0.1:{port}/api"
+        live = _wait_for(f"{base}/health/live", deadline)
+        ready = _wait_for(f"{base}/health/ready", deadline) if live is not None else None
+
+        phases = None
+        try:
+            with urllib.request.urlopen(f"{base}/health/startup", timeout=2) as response:
+                phases = json.load(response)
+        except Exception:
+            pass
+
+        return {
+            "live_ms": round(live * 1000, 1) if live is not None else None,
+            "ready_ms": round((live + ready) * 1000, 1) if ready is not None else None,
+            "server_phases": phases
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Measure import and startup time")
+    parser.add_argument('--module', default='app', help="Module whose import time is measured")
+    parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument('--serve', action='store_true', help="Also start the server and time /api/health")
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--max-import-ms', type=float, help="Fail if importing the module is slower")
+    parser.add_argument('--max-live-ms', type=float, help="Fail if the server takes longer to answer")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = {"import": measure_import(args.module, args.top)}
+    if args.serve:
+        report["server"] = measure_server(args.port)
+
+    failures = []
+    if args.max_import_ms is not None and report["import"]["import_ms"] > args.max_import_ms:
+        failures.append(f"import {report['import']['import_ms']}ms > {args.max_import_ms}ms")
+    if args.serve and args.max_live_ms is not None:
+        live_ms = report["server"]["live_ms"]
+        if live_ms is None or live_ms > args.max_live_ms:
+            failures.append(f"liveness {live_ms}ms > {args.max_live_ms}ms")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("=" * 60)
+        print("⏱️  Startup Profile")
+        print("=" * 60)
+        print(f"import {args.module}: {report['import']['import_ms']} ms")
+        for entry in report["import"]["slowest"]:
+            print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+        if args.serve:
+            server = report["server"]
+            print(f"Server live after: {server['live_ms']} ms")
+            print(f"Server ready after: {server['ready_ms']} ms")
+            for entry in (server["server_phases"] or {}).get("phases", []):
+                print(f"  {entry['duration_ms']:>9.1f} ms  {entry['phase']} (at {entry['start_ms']} ms)")
+        print("=" * 60)
+
+    for failure in failures:
+        print(f"❌ Startup budget exceeded: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
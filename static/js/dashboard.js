@@ -6,7 +6,7 @@ class SafetyDetectionDashboard {
         this.currentModel = null;
         this.confidenceThreshold = 0.5;
         this.isStreaming = false;
-        this.streamInterval = null;
+        this.statsSource = null;
         this.recentDetections = [];
         
         this.initializeEventListeners();
@@ -46,8 +46,13 @@ class SafetyDetectionDashboard {
                 statusIndicator.textContent = 'Connected';
                 statusIndicator.parentElement.querySelector('.fas').className = 'fas fa-circle text-success me-1';
             } else {
-                statusIndicator.textContent = 'Model Loading...';
+                statusIndicator.textContent = data.model_state === 'failed' ? 'Model Failed' : 'Model Loading...';
                 statusIndicator.parentElement.querySelector('.fas').className = 'fas fa-circle text-warning me-1';
+
+                // The server loads the model in the background; check again until ready
+                if (data.model_state !== 'failed') {
+                    setTimeout(() => this.checkHealth(), 2000);
+                }
             }
         } catch (error) {
             console.error('Health check failed:', error);
@@ -67,7 +72,11 @@ class SafetyDetectionDashboard {
             data.models.forEach(model => {
                 const option = document.createElement('option');
                 option.value = model.path;
-                option.textContent = model.name;
+                // Show the profiled single-image latency when available
+                const latency = model.profile && model.profile.latency.find(entry => entry.batch_size === 1);
+                option.textContent = latency
+                    ? `${model.name} (${latency.p50_ms} ms @ ${latency.imgsz}px)`
+                    : model.name;
                 modelSelect.appendChild(option);
             });
         } catch (error) {
@@ -359,10 +368,11 @@ class SafetyDetectionDashboard {
         const streamImg = document.getElementById('streamImg');
         streamImg.src = `${this.apiBaseUrl}/stream?t=${Date.now()}`;
 
-        // Update live statistics periodically
-        this.streamInterval = setInterval(() => {
-            this.updateLiveStatistics();
-        }, 1000);
+        // Subscribe to server-pushed live statistics
+        this.statsSource = new EventSource(`${this.apiBaseUrl}/stream/stats`);
+        this.statsSource.onmessage = (e) => {
+            this.updateLiveStatistics(JSON.parse(e.data));
+        };
     }
 
     stopRealTimeDetection() {
@@ -372,35 +382,31 @@ class SafetyDetectionDashboard {
         document.getElementById('cameraFeed').style.display = 'block';
         document.getElementById('cameraStream').style.display = 'none';
 
-        if (this.streamInterval) {
-            clearInterval(this.streamInterval);
-            this.streamInterval = null;
+        if (this.statsSource) {
+            this.statsSource.close();
+            this.statsSource = null;
         }
     }
 
-    updateLiveStatistics() {
-        // Simulate live statistics update
-        // In a real implementation, this would come from the streaming API
-        const total = Math.floor(Math.random() * 10);
-        const helmets = Math.floor(Math.random() * total);
-        const vests = total - helmets;
-
-        document.getElementById('liveTotalDetections').textContent = total;
-        document.getElementById('liveHelmetCount').textContent = helmets;
-        document.getElementById('liveVestCount').textContent = vests;
+    updateLiveStatistics(stats) {
+        // Rolling window aggregates maintained by the stream pipeline
+        document.getElementById('liveTotalDetections').textContent = stats.total_detections;
+        document.getElementById('liveHelmetCount').textContent = stats.counts.Helmet || 0;
+        document.getElementById('liveVestCount').textContent = stats.counts.Vest || 0;
 
-        // Add recent detection
-        if (total > 0) {
-            this.addRecentDetection('Helmet', 0.85);
-        }
+        // Rebuild recent detections from the server's event ring
+        document.getElementById('recentDetections').innerHTML = '';
+        stats.recent.slice().reverse().forEach(event => {
+            this.addRecentDetection(event.class, event.confidence, new Date(event.timestamp * 1000));
+        });
     }
 
-    addRecentDetection(className, confidence) {
+    addRecentDetection(className, confidence, timestamp = new Date()) {
         const recentDetections = document.getElementById('recentDetections');
         const detectionItem = document.createElement('div');
         detectionItem.className = `detection-item ${className.toLowerCase()}`;
         
-        const time = new Date().toLocaleTimeString();
+        const time = timestamp.toLocaleTimeString();
         detectionItem.innerHTML = `
             <span><i class="fas fa-${className === 'Helmet' ? 'hard-hat' : 'tshirt'} me-2"></i>${className}</span>
             <span class="detection-time">${time}</span>
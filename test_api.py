@@ -6,6 +6,7 @@ Test script for Safety Detection Dashboard API
 import requests
 import json
 import os
+import time
 from datetime import datetime
 
 class SafetyDetectionAPITester:
@@ -29,6 +30,41 @@ class SafetyDetectionAPITester:
             print(f"❌ Health check error: {e}")
             return False
     
+    def test_health_probes(self, timeout=120):
+        """Test liveness, and readiness going from 503 to 200 once the model is loaded"""
+        print("🔍 Testing liveness and readiness probes...")
+        try:
+            response = self.session.get(f"{self.base_url}/health/live")
+            if response.status_code != 200:
+                print(f"❌ Liveness probe failed: {response.status_code}")
+                return False
+            print("✅ Liveness probe: 200")
+            
+            not_ready = 0
+            deadline = time.time() + timeout
+            while True:
+                response = self.session.get(f"{self.base_url}/health/ready")
+                data = response.json()
+                if response.status_code == 200:
+                    break
+                if response.status_code != 503 or data.get('status') != 'not_ready':
+                    print(f"❌ Readiness probe returned {response.status_code}: {data}")
+                    return False
+                if data.get('model_state') == 'failed' or time.time() > deadline:
+                    print(f"❌ Model never became ready: {data.get('model_state')} {data.get('error') or ''}")
+                    return False
+                not_ready += 1
+                time.sleep(0.5)
+            
+            if not_ready:
+                print(f"✅ Readiness probe: 503 for {not_ready} polls while the model loaded, then 200")
+            else:
+                print("✅ Readiness probe: 200 (model was already loaded, 503 phase not observed)")
+            return True
+        except Exception as e:
+            print(f"❌ Health probes error: {e}")
+            return False
+    
     def test_models(self):
         """Test models endpoint"""
         print("🔍 Testing models endpoint...")
@@ -92,12 +128,45 @@ class SafetyDetectionAPITester:
             print(f"❌ Image detection error: {e}")
             return False
     
+    def test_bulk_detection(self, image_paths):
+        """Test bulk image detection"""
+        print(f"🔍 Testing bulk detection: {len(image_paths)} images")
+        try:
+            files = [('images', (os.path.basename(path), open(path, 'rb'))) for path in image_paths]
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/detect/batch",
+                    files=files,
+                    data={'confidence': 0.5},
+                    stream=True
+                )
+                
+                if response.status_code != 200:
+                    print(f"❌ Bulk detection failed: {response.status_code}")
+                    return False
+                
+                results = [json.loads(line) for line in response.iter_lines() if line]
+            finally:
+                for _, (_, f) in files:
+                    f.close()
+            
+            summary = results[-1] if results else {}
+            if summary.get('done'):
+                print(f"✅ Bulk detection successful: {summary['processed']} processed, {summary['failed']} failed")
+                return True
+            else:
+                print("❌ Bulk detection stream ended without a summary")
+                return False
+        except Exception as e:
+            print(f"❌ Bulk detection error: {e}")
+            return False
+    
     def test_video_detection(self, video_path):
         """Test video detection"""
         print(f"🔍 Testing video detection: {video_path}")
         if not os.path.exists(video_path):
             print(f"❌ Video file not found: {video_path}")
-            return False
+            return None
         
         try:
             with open(video_path, 'rb') as f:
@@ -112,12 +181,143 @@ class SafetyDetectionAPITester:
             if response.status_code == 200:
                 data = response.json()
                 print(f"✅ Video detection successful: {data.get('frame_count', 0)} frames processed")
-                return True
+                return data.get('output_path')
             else:
                 print(f"❌ Video detection failed: {response.status_code}")
-                return False
+                return None
         except Exception as e:
             print(f"❌ Video detection error: {e}")
+            return None
+    
+    def test_video_serving(self, video_name):
+        """Test Range and ETag handling when serving a processed video"""
+        print(f"🔍 Testing video serving: {video_name}")
+        url = f"{self.base_url}/video/{video_name}"
+        try:
+            response = self.session.get(url, headers={'Range': 'bytes=0-99'})
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code != 206 or not content_range.startswith('bytes 0-99/'):
+                print(f"❌ Range request failed: {response.status_code} (Content-Range: {content_range or 'missing'})")
+                return False
+            if len(response.content) != 100:
+                print(f"❌ Range request returned {len(response.content)} bytes instead of 100")
+                return False
+            print(f"✅ Range request: 206, Content-Range {content_range}")
+            
+            etag = response.headers.get('ETag')
+            if not etag:
+                print("❌ Video response has no ETag")
+                return False
+            response = self.session.get(url, headers={'If-None-Match': etag})
+            if response.status_code != 304:
+                print(f"❌ Conditional request failed: expected 304, got {response.status_code}")
+                return False
+            print(f"✅ Conditional request: 304 for ETag {etag}")
+            return True
+        except Exception as e:
+            print(f"❌ Video serving error: {e}")
+            return False
+    
+    def test_events(self):
+        """Test detection event summary, series and raw event endpoints"""
+        print("🔍 Testing event endpoints...")
+        try:
+            response = self.session.get(f"{self.base_url}/events/summary")
+            if response.status_code != 200:
+                print(f"❌ Event summary failed: {response.status_code}")
+                return False
+            print(f"✅ Event summary: {response.json().get('totals')}")
+            
+            for granularity in ('minute', 'hour'):
+                response = self.session.get(f"{self.base_url}/events/series", params={'granularity': granularity})
+                if response.status_code != 200:
+                    print(f"❌ Event series ({granularity}) failed: {response.status_code}")
+                    return False
+                print(f"✅ Event series ({granularity}): {len(response.json().get('series', []))} buckets")
+            
+            response = self.session.get(f"{self.base_url}/events/series", params={'granularity': 'week'})
+            if response.status_code != 400:
+                print(f"❌ Unknown granularity should return 400, got {response.status_code}")
+                return False
+            
+            response = self.session.get(f"{self.base_url}/events", params={'limit': 5})
+            if response.status_code != 200 or len(response.json().get('events', [])) > 5:
+                print(f"❌ Raw events failed: {response.status_code}")
+                return False
+            print(f"✅ Raw events: {len(response.json()['events'])} returned, writer {response.json().get('writer')}")
+            
+            # A negative limit must not turn into SQLite's unlimited LIMIT -1
+            response = self.session.get(f"{self.base_url}/events", params={'limit': -1})
+            if response.status_code != 200 or len(response.json().get('events', [])) > 1:
+                print(f"❌ Negative limit was not clamped: {response.status_code}")
+                return False
+            print("✅ Negative limit clamped")
+            return True
+        except Exception as e:
+            print(f"❌ Event endpoints error: {e}")
+            return False
+    
+    def test_sources(self, source_uri="sample_video.mp4"):
+        """Test listing, adding and removing video sources"""
+        print("🔍 Testing sources endpoints...")
+        source_id = "api-test"
+        try:
+            response = self.session.get(f"{self.base_url}/sources")
+            if response.status_code != 200:
+                print(f"❌ Sources listing failed: {response.status_code}")
+                return False
+            data = response.json()
+            print(f"✅ Sources: {len(data.get('sources', []))} registered, {data.get('batches')} batches")
+            
+            invalid = [
+                ({"id": source_id}, "missing uri"),
+                ({"id": "stats", "uri": source_uri}, "reserved id"),
+                ({"id": source_id, "uri": source_uri, "transport": "carrier-pigeon"}, "unknown transport"),
+                ({"id": source_id, "uri": source_uri, "fps": 0}, "zero fps"),
+                ({"id": source_id, "uri": source_uri, "priority": -1}, "negative priority"),
+                ({"id": source_id, "uri": source_uri, "rois": [[0.5, 0.0, 0.2, 1.0]]}, "reversed ROI"),
+                ({"id": source_id, "uri": source_uri, "rois": [[0.0, 0.0, 1.5, 1.0]]}, "out-of-frame ROI"),
+                ({"id": source_id, "uri": source_uri, "rois": [[0.0, 0.0, 1.0]]}, "short ROI")
+            ]
+            for payload, reason in invalid:
+                response = self.session.post(f"{self.base_url}/sources", json=payload)
+                if response.status_code != 400:
+                    print(f"❌ Source with {reason} should return 400, got {response.status_code}")
+                    return False
+            print("✅ Invalid sources rejected")
+            
+            response = self.session.post(f"{self.base_url}/sources", json={
+                "id": source_id, "uri": source_uri, "fps": 2, "rois": [[0.0, 0.5, 0.5, 1.0]]
+            })
+            if response.status_code != 200:
+                print(f"❌ Adding source failed: {response.status_code}")
+                return False
+            print(f"✅ Source added: {response.json().get('source')}")
+            
+            try:
+                response = self.session.post(f"{self.base_url}/sources", json={"id": source_id, "uri": source_uri})
+                if response.status_code != 400:
+                    print(f"❌ Duplicate source should return 400, got {response.status_code}")
+                    return False
+                
+                response = self.session.get(f"{self.base_url}/sources")
+                if source_id not in [source['id'] for source in response.json().get('sources', [])]:
+                    print("❌ Added source missing from listing")
+                    return False
+            finally:
+                response = self.session.delete(f"{self.base_url}/sources/{source_id}")
+            
+            if response.status_code != 200:
+                print(f"❌ Removing source failed: {response.status_code}")
+                return False
+            response = self.session.delete(f"{self.base_url}/sources/{source_id}")
+            if response.status_code != 404:
+                print(f"❌ Removing a missing source should return 404, got {response.status_code}")
+                return False
+            print("✅ Source removed")
+            return True
+        except Exception as e:
+            print(f"❌ Sources endpoints error: {e}")
             return False
     
     def run_all_tests(self):
@@ -135,6 +335,9 @@ class SafetyDetectionAPITester:
             print("❌ Health check failed. Make sure the server is running.")
             return
         
+        # Test liveness/readiness; run right after startup to see the 503 phase
+        self.test_health_probes()
+        
         # Test models
         models = self.test_models()
         if models:
@@ -150,10 +353,18 @@ class SafetyDetectionAPITester:
                 else:
                     print("⚠️  No sample image found for testing")
                 
+                # Test bulk detection with all sample images
+                sample_images = [f"image/val_batch{i}_pred.jpg" for i in range(3)]
+                sample_images = [path for path in sample_images if os.path.exists(path)]
+                if sample_images:
+                    self.test_bulk_detection(sample_images)
+                
                 # Test video detection if sample video exists
                 sample_video = "sample_video.mp4"
                 if os.path.exists(sample_video):
-                    self.test_video_detection(sample_video)
+                    video_name = self.test_video_detection(sample_video)
+                    if video_name:
+                        self.test_video_serving(video_name)
                 else:
                     print("⚠️  No sample video found for testing")
             else:
@@ -161,6 +372,12 @@ class SafetyDetectionAPITester:
         else:
             print("⚠️  No models found. Cannot test detection endpoints.")
         
+        # Test detection event history
+        self.test_events()
+        
+        # Test source management
+        self.test_sources()
+        
         print("=" * 60)
         print("🏁 API testing completed")
         print("=" * 60)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the detection event store range queries
+Run with `python test_event_store.py` or pytest; no server or model needed.
+"""
+
+import os
+import random
+import tempfile
+from collections import Counter
+
+from event_store import EventStore
+
+
+def make_store(timestamps, directory):
+    """Create a store holding one Helmet detection per timestamp"""
+    store = EventStore(os.path.join(directory, 'events.db'))
+    store._write_batch([(ts, 'camera', 'Helmet', 0.9, 0, 0, 10, 10) for ts in timestamps])
+    return store
+
+
+def summary_count(store, start, end):
+    return sum(entry['count'] for entry in store.summary(start, end))
+
+
+def test_summary_includes_partial_minutes():
+    """Events in the partial minutes at either end of the range are counted"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store([7230, 7290], directory)
+        assert summary_count(store, 7200, 7259) == 1
+        assert summary_count(store, 7210, 7300) == 2
+        assert summary_count(store, 7231, 7290) == 0
+        assert summary_count(store, 7230, 7290.5) == 2
+
+
+def test_summary_range_edges_match_raw_events():
+    """summary() counts exactly the events with start <= ts < end"""
+    rng = random.Random(42)
+    timestamps = [rng.uniform(0, 3 * 3600) for _ in range(2000)]
+    timestamps += [0, 60, 3600, 3659.5, 7200, 7260]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(timestamps, directory)
+        edges = [0, 30, 60, 90.5, 3540, 3599.9, 3600, 3601, 3660, 7199, 7200, 7230, 10800, 10801]
+        edges += [rng.uniform(0, 3 * 3600) for _ in range(30)]
+        for start in edges:
+            for end in edges:
+                expected = sum(1 for ts in timestamps if start <= ts < end)
+                assert summary_count(store, start, end) == expected, (start, end)
+
+
+def test_summary_matches_series_up_to_now():
+    """The default summary ending at `now` agrees with the minute series"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store([3600 + 5 * i for i in range(20)], directory)
+        now = 3600 + 5 * 19 + 0.5
+        series = Counter()
+        for bucket in store.series(now - 3600, now, 'minute'):
+            series[bucket['class']] += bucket['count']
+        assert summary_count(store, now - 3600, now) == series['Helmet'] == 20
+
+
+def main():
+    """Run the tests without pytest"""
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,6 @@ Utility functions for Safety Detection Dashboard
 
 import os
 import logging
-import cv2
-import numpy as np
-from PIL import Image
 from datetime import datetime
 import json
 
@@ -44,6 +41,10 @@ def save_uploaded_file(file, upload_dir):
 
 def draw_detections(image, detections):
     """Draw bounding boxes and labels on image"""
+    import cv2
+    import numpy as np
+    from PIL import Image
+    
     img_array = np.array(image)
     
     for detection in detections:
@@ -144,6 +145,8 @@ def get_system_info():
 
 def check_camera_availability(camera_index=0):
     """Check if camera is available"""
+    import cv2
+    
     try:
         cap = cv2.VideoCapture(camera_index)
         if cap.isOpened():
@@ -156,6 +159,8 @@ def check_camera_availability(camera_index=0):
 
 def resize_image(image, max_size=1024):
     """Resize image while maintaining aspect ratio"""
+    from PIL import Image
+    
     width, height = image.size
     
     if width <= max_size and height <= max_size:
@@ -170,6 +175,16 @@ def resize_image(image, max_size=1024):
     
     return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
 
+def parse_timestamp(value, default=None):
+    """Parse epoch seconds or an ISO 8601 string into epoch seconds"""
+    if value is None or value == '':
+        return default
+    
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
 def create_error_response(message, error_code=500):
     """Create standardized error response"""
     return {